@@ -0,0 +1,32 @@
+"""Cascade contact deletes to emails and phones
+
+Revision ID: 5b2f8d1e6c47
+Revises: a3c0dba3fe7f
+Create Date: 2026-10-15 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b2f8d1e6c47'
+down_revision: Union[str, None] = 'a3c0dba3fe7f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_constraint('emails_contact_id_fkey', 'emails', type_='foreignkey')
+    op.create_foreign_key('emails_contact_id_fkey', 'emails', 'contacts', ['contact_id'], ['id'], ondelete='CASCADE')
+    op.drop_constraint('phones_contact_id_fkey', 'phones', type_='foreignkey')
+    op.create_foreign_key('phones_contact_id_fkey', 'phones', 'contacts', ['contact_id'], ['id'], ondelete='CASCADE')
+
+
+def downgrade() -> None:
+    op.drop_constraint('phones_contact_id_fkey', 'phones', type_='foreignkey')
+    op.create_foreign_key('phones_contact_id_fkey', 'phones', 'contacts', ['contact_id'], ['id'])
+    op.drop_constraint('emails_contact_id_fkey', 'emails', type_='foreignkey')
+    op.create_foreign_key('emails_contact_id_fkey', 'emails', 'contacts', ['contact_id'], ['id'])
@@ -0,0 +1,37 @@
+"""Trigram indexes for contact search
+
+Revision ID: 9d4a6e3b1f25
+Revises: 5b2f8d1e6c47
+Create Date: 2026-10-15 12:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4a6e3b1f25'
+down_revision: Union[str, None] = '5b2f8d1e6c47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRIGRAM_INDEXES = (
+    ('ix_contacts_firstname_trgm', 'contacts', 'firstname'),
+    ('ix_contacts_lastname_trgm', 'contacts', 'lastname'),
+    ('ix_emails_email_trgm', 'emails', 'email'),
+    ('ix_phones_phone_trgm', 'phones', 'phone'),
+)
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in TRIGRAM_INDEXES:
+        op.create_index(name, table, [column], unique=False,
+                        postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(TRIGRAM_INDEXES):
+        op.drop_index(name, table_name=table)
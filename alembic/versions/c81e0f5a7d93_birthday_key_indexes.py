@@ -0,0 +1,30 @@
+"""Indexes for upcoming birthday lookups
+
+Revision ID: c81e0f5a7d93
+Revises: 9d4a6e3b1f25
+Create Date: 2026-10-15 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c81e0f5a7d93'
+down_revision: Union[str, None] = '9d4a6e3b1f25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BIRTHDAY_KEY = sa.text('(CAST(EXTRACT(month FROM birthday) * 100 + EXTRACT(day FROM birthday) AS INTEGER))')
+
+
+def upgrade() -> None:
+    op.create_index('ix_contacts_owner_birthday_key', 'contacts', [sa.text('owner_id'), BIRTHDAY_KEY], unique=False)
+    op.create_index('ix_contacts_birthday_key', 'contacts', [BIRTHDAY_KEY], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contacts_birthday_key', table_name='contacts')
+    op.drop_index('ix_contacts_owner_birthday_key', table_name='contacts')
@@ -0,0 +1,28 @@
+"""Index the contact_id foreign keys of emails and phones
+
+Revision ID: e4b7a2c9d610
+Revises: c81e0f5a7d93
+Create Date: 2026-10-15 13:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b7a2c9d610'
+down_revision: Union[str, None] = 'c81e0f5a7d93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_emails_contact_id'), 'emails', ['contact_id'], unique=False)
+    op.create_index(op.f('ix_phones_contact_id'), 'phones', ['contact_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_phones_contact_id'), table_name='phones')
+    op.drop_index(op.f('ix_emails_contact_id'), table_name='emails')
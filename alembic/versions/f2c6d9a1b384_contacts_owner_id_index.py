@@ -0,0 +1,26 @@
+"""Index contacts by owner and id for keyset pagination
+
+Revision ID: f2c6d9a1b384
+Revises: e4b7a2c9d610
+Create Date: 2026-10-15 14:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c6d9a1b384'
+down_revision: Union[str, None] = 'e4b7a2c9d610'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_contacts_owner_id_id', 'contacts', ['owner_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contacts_owner_id_id', table_name='contacts')
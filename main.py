@@ -1,27 +1,61 @@
-import redis.asyncio as redis
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Depends, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from fastapi_limiter import FastAPILimiter
-from fastapi_limiter.depends import RateLimiter
+from redis.exceptions import RedisError
 
 from src.admin import route_admin
 from src.auth import route_auth
+from src.auth.auth import auth_service
+from src.auth.password_utils import start_hash_pool, shutdown_hash_pool
+from src.auth.rate_limiter import SlidingWindowRateLimiter
 
 from src.database.db import get_db
+from src.middleware.cache import ResponseCacheMiddleware
 from src.contacts import route_contacts
-from src.conf.config import config
 
 import logging
 
 logging.basicConfig(level=logging.INFO)
 
-app = FastAPI(title="Contact Management API", description="API для зберігання та управління контактами")
+REDIS_WARM_CONNECTIONS = 10
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        # Concurrent pings open several pooled connections before the first request needs them.
+        await asyncio.gather(*(auth_service.cache.ping() for _ in range(REDIS_WARM_CONNECTIONS)))
+    except RedisError as err:
+        logging.warning(f"Redis connection is not established: {err}")
+    await FastAPILimiter.init(auth_service.cache)
+    start_hash_pool()
+
+    yield
+
+    await shutdown_hash_pool()
+    await auth_service.cache.connection_pool.disconnect()
+
+
+app = FastAPI(title="Contact Management API", description="API для зберігання та управління контактами",
+              lifespan=lifespan, default_response_class=ORJSONResponse)
 
 origins = ["*"]
 
+app.add_middleware(
+    ResponseCacheMiddleware,
+    cache=auth_service.cache,
+    paths={"/api/get_all_roles", "/api/get_all_contacts", "/api/get_all_birthdays"},
+    ttl=20,
+    invalidated_by={("POST", "/api/create_role"): {"/api/get_all_roles"}},
+    private_prefixes=("/contacts/",),
+)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -35,20 +69,7 @@ app.include_router(route_admin.router, tags=["admin"])
 app.include_router(route_auth.router, tags=["authentication"])
 
 
-@app.on_event("startup")
-async def startup():
-    r = await redis.Redis(
-        host=config.REDIS_DOMAIN,
-        port=config.REDIS_PORT,
-        db=0,
-        encoding="utf-8",
-        decode_responses=True,
-    )
-
-    await FastAPILimiter.init(r)
-
-
-@app.get("/", dependencies=[Depends(RateLimiter(times=2, seconds=5))])
+@app.get("/", dependencies=[Depends(SlidingWindowRateLimiter(times=2, seconds=5))])
 async def index():
     return {"msg": "Hello World"}
 
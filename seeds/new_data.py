@@ -1,47 +1,86 @@
 import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
 from faker import Faker
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from src.conf.config import config
-from src.contacts.models import Contact, Email, Phone, Base
+from src.database.db import engine_options
+from src.contacts.models import Base
 
 
-fake = Faker("uk-UA")
+CONTACTS_COUNT = 10
+# Below this many contacts starting worker processes costs more than generating the rows inline.
+PARALLEL_GENERATION_MIN = 10_000
 
 
 async def create_database():
-    engine = create_async_engine(config.DB_URL, future=True)
+    engine = create_async_engine(config.DB_URL, future=True, **engine_options())
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
 
+def generate_rows(contact_ids: list[int]) -> tuple[list[tuple], list[tuple], list[tuple]]:
+    fake = Faker("uk-UA")
+    # Forked workers inherit the parent's random state; reseed so they don't produce identical rows.
+    fake.seed_instance(int.from_bytes(os.urandom(8), "big"))
+    contacts_rows = []
+    emails_rows = []
+    phones_rows = []
+    for contact_id in contact_ids:
+        contacts_rows.append((
+            contact_id,
+            fake.first_name(),
+            fake.last_name(),
+            fake.date_of_birth(minimum_age=18, maximum_age=80),
+            fake.text(max_nb_chars=250),
+        ))
+        for _ in range(fake.random_int(min=1, max=3)):
+            emails_rows.append((fake.email(), contact_id))
+        for _ in range(fake.random_int(min=1, max=3)):
+            phones_rows.append((fake.phone_number(), contact_id))
+    return contacts_rows, emails_rows, phones_rows
+
+
+async def reserve_ids(session: AsyncSession, table: str, count: int) -> list[int]:
+    result = await session.execute(
+        text(f"SELECT nextval(pg_get_serial_sequence('{table}', 'id')) FROM generate_series(1, :count)"),
+        {"count": count},
+    )
+    return list(result.scalars().all())
+
+
 async def populate_database():
-    engine = create_async_engine(config.DB_URL, future=True)
+    engine = create_async_engine(config.DB_URL, future=True, **engine_options())
     async_session = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
 
     async with async_session() as session:
-        for _ in range(10):
-            contact = Contact(
-                firstname=fake.first_name(),
-                lastname=fake.last_name(),
-                birthday=fake.date_of_birth(minimum_age=18, maximum_age=80),
-                description=fake.text(max_nb_chars=250)
-            )
-            session.add(contact)
-
-            for _ in range(fake.random_int(min=1, max=3)):
-                email = Email(
-                    email=fake.email(),
-                    contact=contact
-                )
-                session.add(email)
+        contact_ids = await reserve_ids(session, "contacts", CONTACTS_COUNT)
 
-            for _ in range(fake.random_int(min=1, max=3)):
-                phone = Phone(
-                    phone=fake.phone_number(),
-                    contact=contact
+        if len(contact_ids) < PARALLEL_GENERATION_MIN:
+            results = [generate_rows(contact_ids)]
+        else:
+            workers = os.cpu_count() or 1
+            chunks = [contact_ids[i::workers] for i in range(workers)]
+            loop = asyncio.get_running_loop()
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = await asyncio.gather(
+                    *(loop.run_in_executor(executor, generate_rows, chunk) for chunk in chunks if chunk)
                 )
-                session.add(phone)
+
+        contacts_rows = [row for rows, _, _ in results for row in rows]
+        emails_rows = [row for _, rows, _ in results for row in rows]
+        phones_rows = [row for _, _, rows in results for row in rows]
+
+        connection = await session.connection()
+        raw = (await connection.get_raw_connection()).driver_connection
+        await raw.copy_records_to_table(
+            "contacts", records=contacts_rows,
+            columns=["id", "firstname", "lastname", "birthday", "description"],
+        )
+        await raw.copy_records_to_table("emails", records=emails_rows, columns=["email", "contact_id"])
+        await raw.copy_records_to_table("phones", records=phones_rows, columns=["phone", "contact_id"])
 
         await session.commit()
 
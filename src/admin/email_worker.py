@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+
+from fastapi_mail.errors import ConnectionErrors
+from redis.exceptions import RedisError, ResponseError
+
+from src.admin.emails import EMAIL_QUEUE, EMAIL_QUEUE_MAX_LENGTH, fm, send_email
+from src.auth.auth import auth_service
+
+logger = logging.getLogger(__name__)
+
+EMAIL_QUEUE_GROUP = "email-senders"
+DEAD_LETTER_QUEUE = f"{EMAIL_QUEUE}:dead"
+READ_BATCH_SIZE = 10
+READ_BLOCK_MS = 5000
+RECLAIM_INTERVAL_SECONDS = 60
+RECLAIM_IDLE_MS = 60_000
+MAX_DELIVERIES = 5
+
+
+def consumer_name() -> str:
+    """
+    Names this worker within the consumer group.
+
+    :return: The host name and process ID, so workers sharing a host keep separate pending lists.
+    :rtype: str
+    """
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+async def ensure_group() -> None:
+    """
+    Creates the consumer group of the email stream, and the stream itself, if they do not exist yet.
+    """
+    try:
+        await auth_service.cache.xgroup_create(EMAIL_QUEUE, EMAIL_QUEUE_GROUP, id="0", mkstream=True)
+    except ResponseError as err:
+        if "BUSYGROUP" not in str(err):
+            raise
+
+
+async def deliver(message_id: bytes, fields: dict[bytes, bytes]) -> bool:
+    """
+    Sends one queued email and acknowledges it if it was sent.
+
+    A message that fails stays pending, so :func:`reclaim` retries it later.
+
+    :param message_id: The stream ID of the message.
+    :type message_id: bytes
+    :param fields: The email, username and host of the queued email.
+    :type fields: dict[bytes, bytes]
+    :return: True if the email was sent, False otherwise.
+    :rtype: bool
+    """
+    try:
+        await send_email(fields[b"email"].decode(), fields[b"username"].decode(), fields[b"host"].decode())
+    except Exception as err:
+        logger.error(f"Failed to send queued email {message_id}: {err}")
+        return False
+    await auth_service.cache.xack(EMAIL_QUEUE, EMAIL_QUEUE_GROUP, message_id)
+    return True
+
+
+async def process(consumer: str) -> bool:
+    """
+    Reads a batch of new queued emails and sends them.
+
+    :param consumer: The name of this worker within the consumer group.
+    :type consumer: str
+    :return: True if any messages were read, False otherwise.
+    :rtype: bool
+    """
+    response = await auth_service.cache.xreadgroup(
+        EMAIL_QUEUE_GROUP, consumer, {EMAIL_QUEUE: ">"}, count=READ_BATCH_SIZE, block=READ_BLOCK_MS,
+    )
+    messages = response[0][1] if response else []
+    for message_id, fields in messages:
+        await deliver(message_id, fields)
+    return bool(messages)
+
+
+async def reclaim(consumer: str) -> int:
+    """
+    Takes over messages that stayed unacknowledged for ``RECLAIM_IDLE_MS``, by this or any other worker,
+    and retries them.
+
+    Messages already delivered more than ``MAX_DELIVERIES`` times are moved to ``DEAD_LETTER_QUEUE``
+    and acknowledged instead of being retried again.
+
+    :param consumer: The name of this worker within the consumer group.
+    :type consumer: str
+    :return: The number of messages claimed.
+    :rtype: int
+    """
+    _, messages, _ = await auth_service.cache.xautoclaim(
+        EMAIL_QUEUE, EMAIL_QUEUE_GROUP, consumer, RECLAIM_IDLE_MS, start_id="0-0", count=READ_BATCH_SIZE,
+    )
+    if not messages:
+        return 0
+
+    pending = await auth_service.cache.xpending_range(
+        EMAIL_QUEUE, EMAIL_QUEUE_GROUP, min=messages[0][0], max=messages[-1][0],
+        count=len(messages), consumername=consumer,
+    )
+    deliveries = {entry["message_id"]: entry["times_delivered"] for entry in pending}
+
+    for message_id, fields in messages:
+        if fields is None:
+            # The entry was trimmed from the stream while pending; there is nothing left to send.
+            await auth_service.cache.xack(EMAIL_QUEUE, EMAIL_QUEUE_GROUP, message_id)
+        elif deliveries.get(message_id, 0) > MAX_DELIVERIES:
+            logger.error(f"Giving up on queued email {message_id} after {MAX_DELIVERIES} attempts")
+            await auth_service.cache.xadd(
+                DEAD_LETTER_QUEUE, fields, maxlen=EMAIL_QUEUE_MAX_LENGTH, approximate=True,
+            )
+            await auth_service.cache.xack(EMAIL_QUEUE, EMAIL_QUEUE_GROUP, message_id)
+        else:
+            await deliver(message_id, fields)
+    return len(messages)
+
+
+async def main() -> None:
+    """
+    Sends the emails queued by the API until the process is stopped.
+
+    Every ``RECLAIM_INTERVAL_SECONDS`` the messages left pending by failed sends or stopped workers
+    are reclaimed and retried.
+    """
+    consumer = consumer_name()
+    await ensure_group()
+    try:
+        await fm.connect()
+    except ConnectionErrors as err:
+        logger.warning(f"SMTP connection is not established: {err}")
+    try:
+        next_reclaim = 0.0
+        while True:
+            try:
+                if time.monotonic() >= next_reclaim:
+                    next_reclaim = time.monotonic() + RECLAIM_INTERVAL_SECONDS
+                    await reclaim(consumer)
+                await process(consumer)
+            except RedisError as err:
+                logger.error(f"Email queue unavailable: {err}")
+                await asyncio.sleep(READ_BLOCK_MS / 1000)
+    finally:
+        await fm.close()
+        await auth_service.cache.connection_pool.disconnect()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
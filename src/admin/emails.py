@@ -1,12 +1,25 @@
+import asyncio
+import logging
 from pathlib import Path
+from typing import Optional
 
+import aiosmtplib
 from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
-from fastapi_mail.errors import ConnectionErrors
+from fastapi_mail.errors import ConnectionErrors, PydanticClassRequired
+from fastapi_mail.fastmail import email_dispatched
 from pydantic import EmailStr
+from redis.exceptions import RedisError
 
 from src.auth.auth import auth_service
 from src.conf.config import config
 
+logger = logging.getLogger(__name__)
+
+MAX_MESSAGES_PER_CONNECTION = 100
+
+EMAIL_QUEUE = "email-queue"
+EMAIL_QUEUE_MAX_LENGTH = 10_000
+
 conf = ConnectionConfig(
     MAIL_USERNAME=config.MAIL_USERNAME,
     MAIL_PASSWORD=config.MAIL_PASSWORD,
@@ -22,9 +35,136 @@ conf = ConnectionConfig(
 )
 
 
+class PooledFastMail(FastMail):
+    """
+    FastMail that keeps one authenticated SMTP session open between messages
+    instead of connecting and logging in for every email.
+
+    FastMail has no public hook for reusing a connection, so messages are built with its private
+    ``__prepare_message``. fastapi-mail is pinned in ``pyproject.toml`` to the release this mirrors.
+    """
+
+    def __init__(self, config: ConnectionConfig, max_messages: int = MAX_MESSAGES_PER_CONNECTION) -> None:
+        super().__init__(config)
+        self.max_messages = max_messages
+        self._smtp: Optional[aiosmtplib.SMTP] = None
+        self._sent = 0
+        self._lock = asyncio.Lock()
+
+    async def connect(self) -> None:
+        """
+        Opens the SMTP session and logs in.
+
+        :raises ConnectionErrors: If the mail server cannot be reached or rejects the credentials.
+        """
+        if self.config.SUPPRESS_SEND:
+            return
+        try:
+            smtp = aiosmtplib.SMTP(
+                hostname=self.config.MAIL_SERVER,
+                timeout=self.config.TIMEOUT,
+                port=self.config.MAIL_PORT,
+                use_tls=self.config.MAIL_SSL_TLS,
+                start_tls=self.config.MAIL_STARTTLS,
+                validate_certs=self.config.VALIDATE_CERTS,
+            )
+            await smtp.connect()
+            if self.config.USE_CREDENTIALS:
+                await smtp.login(self.config.MAIL_USERNAME, self.config.MAIL_PASSWORD)
+        except Exception as error:
+            raise ConnectionErrors(
+                f"Exception raised {error}, check your credentials or email service configuration"
+            )
+        self._smtp = smtp
+        self._sent = 0
+
+    async def close(self) -> None:
+        """
+        Closes the SMTP session if it is open.
+        """
+        smtp, self._smtp = self._smtp, None
+        if smtp is not None and smtp.is_connected:
+            try:
+                await smtp.quit()
+            except aiosmtplib.SMTPException:
+                smtp.close()
+
+    async def _session(self) -> aiosmtplib.SMTP:
+        if self._smtp is None or not self._smtp.is_connected or self._sent >= self.max_messages:
+            await self.close()
+            await self.connect()
+        return self._smtp
+
+    async def send_message(self, message: MessageSchema, template_name: Optional[str] = None) -> None:
+        """
+        Sends a message over the pooled SMTP session, with the same signature as ``FastMail.send_message``.
+
+        :param message: The message to send.
+        :type message: MessageSchema
+        :param template_name: The template in ``TEMPLATE_FOLDER`` that renders ``message.template_body``.
+        :type template_name: Optional[str]
+        :raises PydanticClassRequired: If ``message`` is not a MessageSchema.
+        :raises ConnectionErrors: If the mail server cannot be reached or rejects the credentials.
+        """
+        if not isinstance(message, MessageSchema):
+            raise PydanticClassRequired("Message schema should be provided from MessageSchema class")
+
+        if self.config.TEMPLATE_FOLDER and template_name:
+            template = await self.get_mail_template(self.config.template_engine(), template_name)
+            msg = await self._FastMail__prepare_message(message, template)
+        else:
+            msg = await self._FastMail__prepare_message(message)
+
+        if not self.config.SUPPRESS_SEND:
+            async with self._lock:
+                try:
+                    smtp = await self._session()
+                    await smtp.send_message(msg)
+                except aiosmtplib.SMTPServerDisconnected:
+                    await self.close()
+                    smtp = await self._session()
+                    await smtp.send_message(msg)
+                self._sent += 1
+
+        email_dispatched.send(msg)
+
+
+fm = PooledFastMail(conf)
+
+
+async def enqueue_email(email: EmailStr, username: str, host: str) -> None:
+    """
+    Queues a confirmation email in the Redis stream read by ``src.admin.email_worker``.
+
+    :param email: The recipient's email address.
+    :type email: EmailStr
+    :param username: The recipient's username.
+    :type username: str
+    :param host: The base URL the confirmation link points to.
+    :type host: str
+    """
+    try:
+        await auth_service.cache.xadd(
+            EMAIL_QUEUE,
+            {"email": email, "username": username, "host": host},
+            maxlen=EMAIL_QUEUE_MAX_LENGTH,
+            approximate=True,
+        )
+    except RedisError as err:
+        logger.error(f"Could not queue the email to {email}: {err}")
+
+
 async def send_email(email: EmailStr, username: str, host: str):
-    """D
+    """
+    Sends the email confirmation message.
 
+    :param email: The recipient's email address.
+    :type email: EmailStr
+    :param username: The recipient's username.
+    :type username: str
+    :param host: The base URL the confirmation link points to.
+    :type host: str
+    :raises ConnectionErrors: If the mail server cannot be reached, so the queued message is retried.
     """
     try:
         token_verification = auth_service.create_email_token({"sub": email})
@@ -36,7 +176,7 @@ async def send_email(email: EmailStr, username: str, host: str):
             headers={"From": config.MAIL_FROM}
         )
 
-        fm = FastMail(conf)
         await fm.send_message(message, template_name="verify_email.html")
     except ConnectionErrors as err:
-        print(err)
\ No newline at end of file
+        logger.error(f"Could not send the confirmation email to {email}: {err}")
+        raise
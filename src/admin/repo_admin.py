@@ -1,40 +1,54 @@
+import logging
+
 from fastapi import HTTPException
 from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.admin.schemas_admin import RoleCreate
 from src.auth.models import Role
-from src.contacts.models import Contact, Email, Phone
+from src.contacts.models import Contact
+from src.contacts.repo_contacts import ContactRepository
+
+logger = logging.getLogger(__name__)
 
 
 class AdminRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
 
-    async def handle_exception(self, e):
-        print(f"Error: {e}")
-        await self.db.rollback()
+    async def handle_exception(self, e: SQLAlchemyError, rollback: bool = True):
+        logger.error(f"Database error: {e}", exc_info=e)
+        if rollback:
+            await self.db.rollback()
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
-    async def get_all_contacts(self, limit: int, offset: int):
+    async def get_all_contacts_projection(self, limit: int, offset: int, cursor: int | None = None):
         """
+        Retrieves all contacts, ordered by ID, as plain column values with
+        emails and phones aggregated in SQL, without building ORM instances.
+
         :param limit: The maximum number of contacts
-        :param offset: The offset
-         :return: List of :class:`Contact`
+        :param offset: The offset, ignored when ``cursor`` is given
+        :param cursor: The ID of the last contact of the previous page
+        :return: List of dicts shaped like :class:`ContactResponse`
         """
 
         try:
-            stmt = select(Contact).offset(offset).limit(limit)
+            stmt = ContactRepository.select_contact_rows().order_by(Contact.id).limit(limit)
+            stmt = stmt.offset(offset) if cursor is None else stmt.where(Contact.id > cursor)
             result = await self.db.execute(stmt)
-            contacts = result.scalars().all()
-            for contact in contacts:
-                await self.db.refresh(contact, ['emails', 'phones'])
-            return contacts
-        except Exception as e:
-            await self.handle_exception(e)
+            return ContactRepository.contact_rows(result)
+        except SQLAlchemyError as e:
+            await self.handle_exception(e, rollback=False)
 
 
 class RoleRepository:
+    # Roles are only ever added, so a known name never goes stale; names that are not
+    # known yet are always looked up in the database. Only names are kept, never ORM
+    # instances, which belong to the session that loaded them.
+    _known_role_names: set[str] = set()
+
     def __init__(self, db: AsyncSession):
         self.db = db
 
@@ -43,12 +57,30 @@ class RoleRepository:
         self.db.add(new_role)
         await self.db.commit()
         await self.db.refresh(new_role)
+        self._known_role_names.add(new_role.name)
         return new_role
 
     async def get_role(self, role_name: str) -> Role:
         result = await self.db.execute(select(Role).where(Role.name == role_name))
         return result.scalar_one_or_none()
 
+    async def role_exists(self, role_name: str) -> bool:
+        """
+        Checks whether a role exists, without a query if this process has already seen it.
+
+        :param role_name: The name of the role.
+        :type role_name: str
+        :return: True if the role exists, False otherwise.
+        :rtype: bool
+        """
+        if role_name in self._known_role_names:
+            return True
+        result = await self.db.execute(select(Role.id).where(Role.name == role_name))
+        if result.scalar_one_or_none() is None:
+            return False
+        self._known_role_names.add(role_name)
+        return True
+
     async def get_all_roles(self) -> list[Role]:
         result = await self.db.execute(select(Role))
         return result.scalars().all()
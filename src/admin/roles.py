@@ -1,9 +1,6 @@
 from fastapi import Depends, HTTPException
-from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
-from src.database.db import get_db
 from src.auth.models import User
 from src.auth.auth import auth_service
 
@@ -31,24 +28,24 @@ class RoleChecker:
         :type allowed_roles: list[RoleEnum]
         """
         self.allowed_roles = allowed_roles
+        self._allowed_names = frozenset(role.name for role in allowed_roles)
 
-    oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
-
-    async def __call__(self, token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> User:
+    async def __call__(self, user: User = Depends(auth_service.get_current_user)) -> User:
         """
         Validate the user's role.
 
-        :param token: The OAuth2 token from the request.
-        :type token: str
-        :param db: The database session.
-        :type db: AsyncSession
+        The user comes from the same ``get_current_user`` dependency the routes declare, and FastAPI
+        resolves a dependency once per request, so the token is decoded and the user looked up only once.
+
+        :param user: The authenticated user.
+        :type user: User
         :return: The authenticated user.
         :rtype: User
         :raises HTTPException: If the user's role is not allowed to access the endpoint.
         """
-        user = await auth_service.get_current_user(token, db)
-        logger.info(f"User role: {user.role.name}, Allowed roles: {[role.name for role in self.allowed_roles]}")
-        if user.role.name not in [role.name for role in self.allowed_roles]:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"User role: {user.role.name}, Allowed roles: {sorted(self._allowed_names)}")
+        if user.role.name not in self._allowed_names:
             logger.warning("Permission denied")
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
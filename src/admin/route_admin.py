@@ -1,21 +1,20 @@
-from datetime import datetime, date
-
 from fastapi import APIRouter, HTTPException, Depends, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.admin.roles import RoleChecker
 from src.auth.schema_auth import RoleEnum
-from src.contacts.repo_contacts import ContactRepository
-from src.contacts.schema_contacts import ContactResponse
+from src.contacts.repo_contacts import ContactRepository, SEARCH_LIMIT
 from src.database.db import get_db
-from src.admin.schemas_admin import RoleCreate, RoleResponse
-from src.admin.repo_admin import RoleRepository
+from src.admin.schemas_admin import RoleCreate, RoleResponse, AdminContactResponse
+from src.admin.repo_admin import RoleRepository, AdminRepository
 
 router = APIRouter(prefix='/api', tags=['admin'])
 
+ADMIN_DEPENDENCIES = [Depends(RoleChecker([RoleEnum.ADMIN]))]
+
 
 @router.post('/create_role', response_model=RoleResponse, status_code=201,
-             dependencies=[Depends(RoleChecker([RoleEnum.ADMIN]))])
+             dependencies=ADMIN_DEPENDENCIES)
 async def create_role(role_create: RoleCreate, db: AsyncSession = Depends(get_db)):
     """
     Create a new role.
@@ -29,15 +28,14 @@ async def create_role(role_create: RoleCreate, db: AsyncSession = Depends(get_db
     :raises HTTPException: If the role already exists.
     """
     role_repo = RoleRepository(db)
-    existing_role = await role_repo.get_role(role_create.name)
-    if existing_role:
+    if await role_repo.role_exists(role_create.name):
         raise HTTPException(status_code=400, detail="Role already exists")
     new_role = await role_repo.create_role(role_create)
     return new_role
 
 
 @router.get('/get_all_roles', response_model=list[RoleResponse],
-            dependencies=[Depends(RoleChecker([RoleEnum.ADMIN]))])
+            dependencies=ADMIN_DEPENDENCIES)
 async def get_all_roles(db: AsyncSession = Depends(get_db)):
     """
     Retrieve all roles.
@@ -52,30 +50,31 @@ async def get_all_roles(db: AsyncSession = Depends(get_db)):
     return roles
 
 
-@router.get("/get_all_contacts", response_model=list[ContactResponse],
-            dependencies=[Depends(RoleChecker([RoleEnum.ADMIN]))])
+@router.get("/get_all_contacts", response_model=list[AdminContactResponse],
+            dependencies=ADMIN_DEPENDENCIES)
 async def get_all_contacts(limit: int = Query(10, ge=1, le=500), offset: int = Query(0, ge=0),
-                           db: AsyncSession = Depends(get_db)):
+                           cursor: int | None = Query(None, ge=0), db: AsyncSession = Depends(get_db)):
     """
-    Retrieve all contacts.
+    Retrieve all contacts, ordered by ID.
 
     :param limit: The maximum number of contacts to return.
     :type limit: int
     :param offset: The number of contacts to skip before starting to collect results.
     :type offset: int
+    :param cursor: The ID of the last contact of the previous page; when given, ``offset`` is ignored.
+    :type cursor: int | None
     :param db: The database session.
     :type db: AsyncSession
     :return: A list of all contacts.
-    :rtype: list[ContactResponse]
+    :rtype: list[AdminContactResponse]
     """
-    contacts = await ContactRepository.get_all_contacts(limit, offset, db)
-    for contact in contacts:
-        contact.birthday = contact.birthday.strftime("%d-%m-%Y")
+    admin_repo = AdminRepository(db)
+    contacts = await admin_repo.get_all_contacts_projection(limit, offset, cursor)
     return contacts
 
 
-@router.get("/get_all_birthdays", response_model=list[ContactResponse],
-            dependencies=[Depends(RoleChecker([RoleEnum.ADMIN]))])
+@router.get("/get_all_birthdays", response_model=list[AdminContactResponse],
+            dependencies=ADMIN_DEPENDENCIES)
 async def get_all_birthdays(limit: int = Query(10, ge=1, le=500), offset: int = Query(0, ge=0),
                             db: AsyncSession = Depends(get_db)):
     """
@@ -88,30 +87,30 @@ async def get_all_birthdays(limit: int = Query(10, ge=1, le=500), offset: int =
     :param db: The database session.
     :type db: AsyncSession
     :return: A list of contacts with upcoming birthdays.
-    :rtype: list[ContactResponse]
+    :rtype: list[AdminContactResponse]
     """
-    contacts = await ContactRepository.get_all_birthdays(limit, offset, db)
-    for contact in contacts:
-        if isinstance(contact.birthday, (datetime, date)):
-            contact.birthday = contact.birthday.strftime("%d-%m-%Y")
+    contacts = await ContactRepository(db).get_all_birthdays_projection(limit, offset)
     return contacts
 
 
-@router.get("/search_all", response_model=list[ContactResponse],
-            dependencies=[Depends(RoleChecker([RoleEnum.ADMIN]))])
-async def search_all_contacts(query: str = Query(None), db: AsyncSession = Depends(get_db)):
+@router.get("/search_all", response_model=list[AdminContactResponse],
+            dependencies=ADMIN_DEPENDENCIES)
+async def search_all_contacts(query: str = Query(..., min_length=1), limit: int = Query(SEARCH_LIMIT, ge=1, le=500),
+                              db: AsyncSession = Depends(get_db)):
     """
     Search for contacts based on a query string.
 
     :param query: The query string to search for.
     :type query: str
+    :param limit: The maximum number of contacts to return.
+    :type limit: int
     :param db: The database session.
     :type db: AsyncSession
     :return: A list of contacts matching the search query.
-    :rtype: list[ContactResponse]
+    :rtype: list[AdminContactResponse]
     :raises HTTPException: If no contacts are found matching the query.
     """
-    contacts = await ContactRepository.search_all_contacts(query, db)
+    contacts = await ContactRepository(db).search_all_contacts(query, limit)
     if not contacts:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found")
     return contacts
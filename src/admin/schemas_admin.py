@@ -1,4 +1,8 @@
-from pydantic import BaseModel
+from datetime import date
+
+from pydantic import BaseModel, ConfigDict, field_serializer
+
+from src.contacts.schema_contacts import ContactResponse
 
 
 class RoleCreate(BaseModel):
@@ -8,5 +12,11 @@ class RoleCreate(BaseModel):
 class RoleResponse(BaseModel):
     id: int
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+class AdminContactResponse(ContactResponse):
+
+    @field_serializer("birthday")
+    def serialize_birthday(self, birthday: date) -> str | None:
+        return birthday.strftime("%d-%m-%Y") if birthday else None
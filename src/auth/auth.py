@@ -1,12 +1,19 @@
-import pickle
+import asyncio
+import hashlib
+import time
+import uuid
+import weakref
+from dataclasses import dataclass
 from datetime import timedelta, datetime, timezone
 from typing import Optional
 
+import orjson
 import redis.asyncio as redis
+from redis.exceptions import RedisError
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
-from passlib.context import CryptContext
+import jwt
+from jwt import PyJWTError, ExpiredSignatureError
 
 from src.auth.models import User
 from src.auth.schema_auth import TokenData
@@ -16,6 +23,7 @@ from starlette import status
 
 from src.database.db import get_db
 from src.auth.repo_auth import UserRepository
+from src.auth.password_utils import verify_password_async
 from src.conf.config import config
 import logging
 
@@ -24,20 +32,63 @@ logger = logging.getLogger(__name__)
 ACCESS_TOKEN_EXPIRE_MINUTES = 300
 REFRESH_TOKEN_EXPIRE_DAYS = 7
 CONFIG_EMAIL_EXPIRE_DAYS = 1
+ACCESS_TOKEN_EXPIRE = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+REFRESH_TOKEN_EXPIRE = timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+CONFIG_EMAIL_EXPIRE = timedelta(days=CONFIG_EMAIL_EXPIRE_DAYS)
+JWT_SECRET_KEY = config.SECRET_KEY_JWT
+JWT_ALGORITHM = config.ALGORITHM
+JWT_ALGORITHMS = (JWT_ALGORITHM,)
+JWT_DECODE_OPTIONS = {"require": ["exp", "sub"]}
+DECODED_TOKENS_CACHE_SIZE = 4096
+ISSUED_TOKENS_CACHE_SIZE = 10_000
+ACCESS_TOKEN_REUSE_SECONDS = 540
+USER_CACHE_EXPIRE_SECONDS = 300
+CURRENT_USER_CACHE_SECONDS = 30
+# Bump when the cached user layout changes so entries written by the previous release read as misses.
+USER_CACHE_FORMAT = b"\x01"
+REDIS_MAX_CONNECTIONS = 200
+REDIS_HEALTH_CHECK_INTERVAL = 30
+REFRESH_TOKEN_KEY_PREFIX = "refresh:"
+VERIFIED_PASSWORD_KEY_PREFIX = "pwok:"
+VERIFIED_PASSWORD_EXPIRE_SECONDS = 60
+PASSWORD_CACHE_PEPPER = hashlib.sha512(f"pwok:{JWT_SECRET_KEY}".encode()).digest()
+
+
+@dataclass(slots=True)
+class CachedRole:
+    id: int
+    name: str
+
+
+@dataclass(slots=True)
+class CachedUser:
+    """
+    The attributes of a :class:`User` that request handlers read, as kept in the user cache.
+    """
+    id: int
+    username: str
+    email: str
+    is_active: bool
+    role_id: Optional[int]
+    avatar: Optional[str]
+    role: Optional[CachedRole]
 
 
 class Auth:
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-    SECRET_KEY = config.SECRET_KEY_JWT
-    ALGORITHM = config.ALGORITHM
-    cache = redis.Redis(
+    cache = redis.Redis(connection_pool=redis.ConnectionPool(
         host=config.REDIS_DOMAIN,
         port=config.REDIS_PORT,
         db=0,
         # password=config.REDIS_PASSWORD,
-    )
+        max_connections=REDIS_MAX_CONNECTIONS,
+        health_check_interval=REDIS_HEALTH_CHECK_INTERVAL,
+    ))
 
     oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
+    _user_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+    _token_cache: dict[bytes, dict] = {}
+    _current_users: dict[bytes, tuple[float, CachedUser]] = {}
+    _issued_access_tokens: dict[str, tuple[float, str]] = {}
 
     def create_access_token(self, data: dict, expires_delta: Optional[timedelta] = None) -> str:
         """
@@ -51,11 +102,30 @@ class Auth:
         :rtype: str
         """
         to_encode = data.copy()
-        expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+        expire = datetime.now(timezone.utc) + (expires_delta or ACCESS_TOKEN_EXPIRE)
         to_encode.update({"exp": expire, "scope": "access_token"})
-        encoded_access_token = jwt.encode(to_encode, self.SECRET_KEY, algorithm=self.ALGORITHM)
+        encoded_access_token = jwt.encode(to_encode, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
         return encoded_access_token
 
+    def issue_access_token(self, email: str) -> str:
+        """
+        Returns an access token for a user, reusing the one issued to the same user in the last few minutes.
+
+        :param email: The email of the user the token is issued to.
+        :type email: str
+        :return: The encoded access token.
+        :rtype: str
+        """
+        now = time.monotonic()
+        issued = self._issued_access_tokens.get(email)
+        if issued is not None and issued[0] > now:
+            return issued[1]
+        access_token = self.create_access_token(data={"sub": email})
+        if issued is None and len(self._issued_access_tokens) >= ISSUED_TOKENS_CACHE_SIZE:
+            del self._issued_access_tokens[next(iter(self._issued_access_tokens))]
+        self._issued_access_tokens[email] = (now + ACCESS_TOKEN_REUSE_SECONDS, access_token)
+        return access_token
+
     def create_refresh_token(self, data: dict, expires_delta: Optional[timedelta] = None) -> str:
         """
         Creates a refresh token with a specified expiration time.
@@ -68,11 +138,123 @@ class Auth:
         :rtype: str
         """
         to_encode = data.copy()
-        expire = datetime.now(timezone.utc) + (expires_delta or timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS))
+        expire = datetime.now(timezone.utc) + (expires_delta or REFRESH_TOKEN_EXPIRE)
         to_encode.update({"exp": expire, "scope": "refresh_token"})
-        encoded_jwt = jwt.encode(to_encode, self.SECRET_KEY, algorithm=self.ALGORITHM)
+        to_encode.setdefault("jti", uuid.uuid4().hex)
+        encoded_jwt = jwt.encode(to_encode, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
         return encoded_jwt
 
+    async def issue_refresh_token(self, email: str) -> str:
+        """
+        Creates a refresh token for a user and records its id in the cache.
+
+        :param email: The email of the user the token is issued to.
+        :type email: str
+        :return: The encoded refresh token.
+        :rtype: str
+        :raises HTTPException: If the cache is unreachable, since a token that was not recorded could never be redeemed.
+        """
+        jti = uuid.uuid4().hex
+        refresh_token = self.create_refresh_token(data={"sub": email, "jti": jti})
+        try:
+            await self.cache.set(f"{REFRESH_TOKEN_KEY_PREFIX}{jti}", email, ex=REFRESH_TOKEN_EXPIRE)
+        except RedisError as e:
+            logger.error(f"Error storing refresh token: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Refresh tokens are temporarily unavailable",
+            )
+        return refresh_token
+
+    async def redeem_refresh_token(self, refresh_token: str, db: AsyncSession) -> str:
+        """
+        Validates a refresh token and consumes it, so each refresh token can be used only once.
+
+        The email recorded by :meth:`issue_refresh_token` is returned without a database query.
+        While the cache is unreachable, tokens with an id are rejected rather than checked against
+        the database, since there would be no way to tell whether they were already used. Tokens
+        issued without an id, before refresh tokens were recorded, are still checked against the database.
+
+        :param refresh_token: The refresh token to redeem.
+        :type refresh_token: str
+        :param db: The database session dependency.
+        :type db: AsyncSession
+        :return: The email of the user the token was issued to.
+        :rtype: str
+        :raises HTTPException: If the token is invalid, has already been used or its user no longer exists,
+            or if the cache is unreachable.
+        """
+        invalid_token_exception = HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+        try:
+            payload = self.decode_token(refresh_token)
+        except PyJWTError:
+            raise invalid_token_exception
+        if payload.get("scope") != "refresh_token":
+            raise invalid_token_exception
+
+        jti = payload.get("jti")
+        if jti is not None:
+            try:
+                email = await self.cache.getdel(f"{REFRESH_TOKEN_KEY_PREFIX}{jti}")
+            except RedisError as e:
+                logger.error(f"Error reading refresh token: {e}")
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Refresh tokens are temporarily unavailable",
+                )
+            if email is None:
+                raise invalid_token_exception
+            return email.decode()
+
+        user = await UserRepository(db).get_user_by_email(payload["sub"])
+        if user is None:
+            raise invalid_token_exception
+        return user.email
+
+    @staticmethod
+    def token_key(token: str) -> bytes:
+        """
+        Derives the key under which per-token results are cached in this process.
+
+        A digest is used so the caches do not keep usable tokens in memory.
+
+        :param token: The token.
+        :type token: str
+        :return: The cache key.
+        :rtype: bytes
+        """
+        return hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+
+    def decode_token(self, token: str) -> dict:
+        """
+        Decodes a token, reusing the result of earlier decodes of the same token.
+
+        Every token must carry ``exp`` and ``sub`` claims. The returned payload is shared
+        between callers and must not be modified.
+
+        :param token: The token to decode.
+        :type token: str
+        :return: The token payload.
+        :rtype: dict
+        :raises PyJWTError: If the token is invalid, has expired or lacks a required claim.
+        """
+        key = self.token_key(token)
+        payload = self._token_cache.get(key)
+        if payload is None:
+            payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=JWT_ALGORITHMS, options=JWT_DECODE_OPTIONS)
+            if len(self._token_cache) >= DECODED_TOKENS_CACHE_SIZE:
+                del self._token_cache[next(iter(self._token_cache))]
+            self._token_cache[key] = payload
+        exp = payload.get("exp")
+        if exp is not None and exp <= time.time():
+            self._token_cache.pop(key, None)
+            raise ExpiredSignatureError("Signature has expired.")
+        return payload
+
     def decode_access_token(self, token: str) -> Optional[TokenData]:
         """
         Decodes an access token and extracts the token data.
@@ -83,14 +265,8 @@ class Auth:
         :rtype: Optional[TokenData]
         """
         try:
-            payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
-            email = payload["sub"]
-            logger.info(f"Decoded payload: {payload}")
-
-            if email is None:
-                return None
-            return TokenData(username=email)
-        except JWTError:
+            return TokenData(username=self.decode_token(token)["sub"])
+        except PyJWTError:
             logger.error("Failed to decode access token")
             return None
 
@@ -104,15 +280,14 @@ class Auth:
         :rtype: Optional[TokenData]
         """
         try:
-            payload = jwt.decode(refresh_token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
-            if payload["scope"] == "refresh_token":
-                email = payload["sub"]
-                return TokenData(username=email)
+            payload = self.decode_token(refresh_token)
+            if payload.get("scope") == "refresh_token":
+                return TokenData(username=payload["sub"])
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid scope for token",
             )
-        except JWTError:
+        except PyJWTError:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Could not validate credentials"
@@ -137,22 +312,42 @@ class Auth:
         )
 
         try:
-            payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
-            if payload["scope"] != "access_token":
-                logger.error(f"Invalid token scope: {payload.get('scope')}")
-                raise credentials_exception
-            email = payload.get("sub")
-            if email is None:
-                logger.error("Token does not contain email")
-                raise credentials_exception
-        except JWTError as e:
-            logger.error(f"JWTError during token decoding: {e}")
+            payload = self.decode_token(token)
+        except PyJWTError as e:
+            logger.error(f"PyJWTError during token decoding: {e}")
             raise credentials_exception
+        if payload.get("scope") != "access_token":
+            logger.error(f"Invalid token scope: {payload.get('scope')}")
+            raise credentials_exception
+
+        # Requests carrying the same token within a few seconds reuse the user resolved for it,
+        # without a cache or database round-trip.
+        key = self.token_key(token)
+        now = time.monotonic()
+        entry = self._current_users.get(key)
+        if entry is not None and entry[0] > now:
+            return entry[1]
 
-        user = await self._get_user_from_cache_or_db(email, db, credentials_exception)
+        user = await self._get_user_from_cache_or_db(payload["sub"], db, credentials_exception)
         logger.info(f"Fetched user: {user}, with role: {user.role.name if user.role else 'No role'}")
+        # Only detached cache snapshots are shared between requests, never session-bound ORM instances.
+        if isinstance(user, CachedUser):
+            if len(self._current_users) >= DECODED_TOKENS_CACHE_SIZE:
+                del self._current_users[next(iter(self._current_users))]
+            self._current_users[key] = (now + CURRENT_USER_CACHE_SECONDS, user)
         return user
 
+    def forget_current_user(self, email: str) -> None:
+        """
+        Drops the users resolved for tokens of an email from this process, so changes made here are
+        seen by the next request. Other workers pick them up within ``CURRENT_USER_CACHE_SECONDS``.
+
+        :param email: The email of the user.
+        :type email: str
+        """
+        for key in [key for key, (_, user) in self._current_users.items() if user.email == email]:
+            del self._current_users[key]
+
     async def _get_user_from_cache_or_db(self, email: str, db: AsyncSession,
                                          credentials_exception: HTTPException) -> User:
         """
@@ -168,24 +363,160 @@ class Auth:
         :rtype: User
         :raises HTTPException: If the user cannot be found in cache or database.
         """
+        user = await self.find_user(email, db)
+        if user is None:
+            raise credentials_exception
+        return user
+
+    async def find_user(self, email: str, db: AsyncSession) -> Optional[User | CachedUser]:
+        """
+        Retrieves a user by email from the cache, falling back to the database and caching the result.
+
+        :param email: The email of the user to retrieve.
+        :type email: str
+        :param db: The database session dependency.
+        :type db: AsyncSession
+        :return: The cached or database user, or None if no user has this email.
+        :rtype: Optional[User | CachedUser]
+        """
         user_hash = str(email)
+        user = await self._get_cached_user(user_hash)
+        if user is not None:
+            return user
+
+        # Only one concurrent miss per email queries the database; the rest
+        # wait here and then read what it cached.
+        lock = self._user_locks.get(user_hash)
+        if lock is None:
+            lock = self._user_locks[user_hash] = asyncio.Lock()
+        async with lock:
+            user = await self._get_cached_user(user_hash)
+            if user is not None:
+                return user
+            logger.info("User not in cache, fetching from database")
+            user_repo = UserRepository(db)
+            user = await user_repo.get_user_by_email(email)
+            if user is not None:
+                await self.cache_user(user)
+        return user
+
+    async def cache_user(self, user: User) -> None:
+        """
+        Stores a user in the cache with its expiry in a single command.
+
+        :param user: The user to cache.
+        :type user: User
+        """
+        self.forget_current_user(user.email)
+        try:
+            await self.cache.set(str(user.email), self.serialize_user(user), ex=USER_CACHE_EXPIRE_SECONDS)
+        except RedisError as e:
+            logger.error(f"Error caching user: {e}")
+
+    async def evict_user(self, email: str) -> None:
+        """
+        Removes a user from the cache so the next request reloads it from the database.
+
+        :param email: The email of the user to evict.
+        :type email: str
+        """
+        self.forget_current_user(email)
+        try:
+            await self.cache.delete(str(email))
+        except RedisError as e:
+            logger.error(f"Error evicting cached user: {e}")
+
+    async def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+        """
+        Verifies a password, skipping the hash check if the same password matched the same hash in the last minute.
+
+        Successful checks are remembered in the cache under a keyed BLAKE2b digest of the password and
+        the stored hash, so no password reaches Redis and a password change invalidates the entry.
+
+        :param plain_password: The plain text password to verify.
+        :type plain_password: str
+        :param hashed_password: The hashed password to check against.
+        :type hashed_password: str
+        :return: True if the plain password matches the hashed password, False otherwise.
+        :rtype: bool
+        """
+        digest = hashlib.blake2b(
+            plain_password.encode("utf-8") + b"\0" + hashed_password.encode("utf-8"),
+            key=PASSWORD_CACHE_PEPPER,
+            digest_size=16,
+        ).hexdigest()
+        key = f"{VERIFIED_PASSWORD_KEY_PREFIX}{digest}"
+        try:
+            if await self.cache.exists(key):
+                return True
+        except RedisError as e:
+            logger.error(f"Error reading verified password cache: {e}")
+
+        if not await verify_password_async(plain_password, hashed_password):
+            return False
+        try:
+            await self.cache.set(key, 1, ex=VERIFIED_PASSWORD_EXPIRE_SECONDS)
+        except RedisError as e:
+            logger.error(f"Error caching verified password: {e}")
+        return True
+
+    async def _get_cached_user(self, user_hash: str) -> Optional[CachedUser]:
+        """
+        Reads a user from the cache, treating an unreachable cache or an unreadable entry as a miss.
+
+        :param user_hash: The cache key of the user.
+        :type user_hash: str
+        :return: The cached user, or None on a miss.
+        :rtype: Optional[CachedUser]
+        """
         try:
             cached_user = await self.cache.get(user_hash)
             if cached_user:
                 logger.info("User fetched from cache")
-                user = pickle.loads(cached_user)
-            else:
-                logger.info("User not in cache, fetching from database")
-                user_repo = UserRepository(db)
-                user = await user_repo.get_user_by_email(email)
-                if user is None:
-                    raise credentials_exception
-                await self.cache.set(user_hash, pickle.dumps(user))
-                await self.cache.expire(user_hash, 300)
-        except Exception as e:
-            logger.error(f"Error fetching user: {e}")
-            raise credentials_exception
-        return user
+                return self.deserialize_user(cached_user)
+        except RedisError as e:
+            logger.error(f"Error reading user cache: {e}")
+        except (ValueError, KeyError, TypeError) as e:
+            logger.error(f"Unreadable user cache entry: {e}")
+        return None
+
+    @staticmethod
+    def serialize_user(user: User) -> bytes:
+        """
+        Serializes the fields of a user needed by request handlers into JSON for the cache.
+
+        :param user: The user to serialize.
+        :type user: User
+        :return: The serialized user.
+        :rtype: bytes
+        """
+        return USER_CACHE_FORMAT + orjson.dumps({
+            "id": user.id,
+            "username": user.username,
+            "email": user.email,
+            "is_active": user.is_active,
+            "role_id": user.role_id,
+            "role_name": user.role.name if user.role else None,
+            "avatar": getattr(user, "avatar", None),
+        })
+
+    @staticmethod
+    def deserialize_user(data: bytes) -> "CachedUser":
+        """
+        Rebuilds a user from data produced by :meth:`serialize_user`.
+
+        :param data: The serialized user.
+        :type data: bytes
+        :return: A lightweight stand-in for the user with the same attributes.
+        :rtype: CachedUser
+        :raises ValueError: If the data was written in another cache format.
+        """
+        if not data.startswith(USER_CACHE_FORMAT):
+            raise ValueError("Cached user has an outdated format")
+        fields = orjson.loads(data[len(USER_CACHE_FORMAT):])
+        role_name = fields.pop("role_name")
+        role = CachedRole(id=fields["role_id"], name=role_name) if role_name is not None else None
+        return CachedUser(**fields, role=role)
 
     def create_email_token(self, data: dict) -> str:
         """
@@ -197,9 +528,9 @@ class Auth:
         :rtype: str
         """
         to_encode = data.copy()
-        expire = datetime.now(timezone.utc) + timedelta(days=CONFIG_EMAIL_EXPIRE_DAYS)
+        expire = datetime.now(timezone.utc) + CONFIG_EMAIL_EXPIRE
         to_encode.update({"iat": datetime.now(timezone.utc), "exp": expire})
-        token = jwt.encode(to_encode, self.SECRET_KEY, algorithm=self.ALGORITHM)
+        token = jwt.encode(to_encode, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
         return token
 
     def get_email_from_token(self, token: str) -> str:
@@ -213,15 +544,8 @@ class Auth:
         :raises HTTPException: If the token is invalid or the email cannot be extracted.
         """
         try:
-            payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
-            email = payload.get("sub")
-            if email is None:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Could not validate credentials",
-                )
-            return email
-        except JWTError as e:
+            return self.decode_token(token)["sub"]
+        except PyJWTError:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Could not validate credentials",
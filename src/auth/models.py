@@ -13,7 +13,7 @@ class User(Base):
     is_active: Mapped[bool] = mapped_column(Boolean, default=False)
     contacts: Mapped[list["Contact"]] = relationship("Contact", back_populates="owner")
     role_id: Mapped[int] = mapped_column(Integer, ForeignKey("roles.id"), nullable=True)
-    role: Mapped["Role"] = relationship("Role", lazy="selectin")
+    role: Mapped["Role"] = relationship("Role")
 
 
 class Role(Base):
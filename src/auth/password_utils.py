@@ -1,24 +1,121 @@
-from passlib.context import CryptContext
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+import bcrypt
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+
+from src.conf.config import config
+
+ARGON2_PREFIX = "$argon2"
+# Forking a process that runs an event loop and holds open sockets copies both into the workers,
+# so they are started fresh instead; forkserver is cheaper but is not available on Windows.
+HASH_POOL_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+password_hasher = PasswordHasher(
+    time_cost=config.ARGON2_TIME_COST,
+    memory_cost=config.ARGON2_MEMORY_COST,
+    parallelism=config.ARGON2_PARALLELISM,
+)
+
+_hash_pool: Optional[ProcessPoolExecutor] = None
 
 
 def get_password_hash(password: str) -> str:
     """
-    Generates a hashed password using bcrypt.
+    Generates a hashed password using argon2id.
 
     :param password: The plain text password to hash.
     :type password: str
     :return: The hashed password.
     :rtype: str
     """
-    return pwd_context.hash(password)
+    return password_hasher.hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verifies if the provided plain password matches the hashed password.
 
+    Hashes created before the switch to argon2id are bcrypt hashes and are still accepted.
+
+    :param plain_password: The plain text password to verify.
+    :type plain_password: str
+    :param hashed_password: The hashed password to check against.
+    :type hashed_password: str
+    :return: True if the plain password matches the hashed password, False otherwise.
+    :rtype: bool
+    """
+    if not hashed_password.startswith(ARGON2_PREFIX):
+        return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
+    try:
+        return password_hasher.verify(hashed_password, plain_password)
+    except (VerificationError, InvalidHashError):
+        return False
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """
+    Checks whether a hash should be replaced, because it is a bcrypt hash or uses outdated argon2 parameters.
+
+    :param hashed_password: The hashed password to check.
+    :type hashed_password: str
+    :return: True if the password should be hashed again, False otherwise.
+    :rtype: bool
+    """
+    if not hashed_password.startswith(ARGON2_PREFIX):
+        return True
+    return password_hasher.check_needs_rehash(hashed_password)
+
+
+def start_hash_pool(max_workers: Optional[int] = None) -> None:
+    """
+    Starts the worker processes used by the async hashing helpers.
+
+    Until it is started, the helpers fall back to the default thread pool.
+
+    :param max_workers: The number of worker processes. Defaults to the number of CPUs.
+    :type max_workers: Optional[int]
+    """
+    global _hash_pool
+    if _hash_pool is None:
+        _hash_pool = ProcessPoolExecutor(
+            max_workers=max_workers or os.cpu_count(),
+            mp_context=multiprocessing.get_context(HASH_POOL_START_METHOD),
+        )
+
+
+async def shutdown_hash_pool() -> None:
+    """
+    Stops the worker processes started by :func:`start_hash_pool`.
+
+    The pool is joined in a thread, so the event loop keeps running while the workers exit.
+    """
+    global _hash_pool
+    if _hash_pool is not None:
+        pool, _hash_pool = _hash_pool, None
+        await asyncio.to_thread(pool.shutdown)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    Generates a hashed password in a worker process so the event loop is not blocked.
+
+    :param password: The plain text password to hash.
+    :type password: str
+    :return: The hashed password.
+    :rtype: str
+    """
+    return await asyncio.get_running_loop().run_in_executor(_hash_pool, get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verifies a password in a worker process so the event loop is not blocked.
+
     :param plain_password: The plain text password to verify.
     :type plain_password: str
     :param hashed_password: The hashed password to check against.
@@ -26,4 +123,5 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     :return: True if the plain password matches the hashed password, False otherwise.
     :rtype: bool
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return await asyncio.get_running_loop().run_in_executor(_hash_pool, verify_password, plain_password,
+                                                            hashed_password)
@@ -0,0 +1,159 @@
+import logging
+import time
+import uuid
+
+from fastapi import HTTPException, Request
+from redis.exceptions import RedisError
+from starlette import status
+
+from src.auth.auth import auth_service
+
+logger = logging.getLogger(__name__)
+
+SLIDING_WINDOW_SCRIPT = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', key, 0, now - window)
+if redis.call('ZCARD', key) >= limit then
+    return 0
+end
+redis.call('ZADD', key, now, ARGV[4])
+redis.call('PEXPIRE', key, window)
+return 1
+"""
+
+TOKEN_BUCKET_SCRIPT = """
+local key = KEYS[1]
+local capacity = tonumber(ARGV[1])
+local refill_per_ms = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * refill_per_ms)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', key, 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', key, ARGV[4])
+return allowed
+"""
+
+
+class SlidingWindowRateLimiter:
+    """
+    A dependency class that limits requests per client over a rolling time window.
+
+    The whole check runs as one Lua script in Redis, so it costs a single round-trip
+    and concurrent requests cannot both slip through the last free slot. If Redis is
+    unreachable the request is let through and a warning is logged.
+
+    :param times: The number of requests allowed within the window.
+    :type times: int
+    :param seconds: The length of the window in seconds.
+    :type seconds: int
+
+    :raises HTTPException: If the client has exhausted the limit.
+    """
+
+    script = auth_service.cache.register_script(SLIDING_WINDOW_SCRIPT)
+
+    def __init__(self, times: int, seconds: int):
+        """
+        Initialize the limiter with the allowed number of requests per window.
+
+        :param times: The number of requests allowed within the window.
+        :type times: int
+        :param seconds: The length of the window in seconds.
+        :type seconds: int
+        """
+        self.times = times
+        self.seconds = seconds
+        self.window_ms = seconds * 1000
+
+    async def __call__(self, request: Request) -> None:
+        """
+        Record the request and reject it if the client is over the limit.
+
+        :param request: The incoming HTTP request.
+        :type request: Request
+        :raises HTTPException: If the client has exhausted the limit.
+        """
+        client = request.client.host if request.client else "unknown"
+        key = f"rl:{request.scope['path']}:{client}"
+        now_ms = int(time.time() * 1000)
+        try:
+            allowed = await self.script(
+                keys=[key], args=[now_ms, self.window_ms, self.times, f"{now_ms}-{uuid.uuid4().hex}"],
+            )
+        except RedisError as err:
+            logger.warning(f"Rate limit window unavailable: {err}")
+            return
+        if not allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too Many Requests",
+                headers={"Retry-After": str(self.seconds)},
+            )
+
+
+class TokenBucketRateLimiter:
+    """
+    A dependency class that limits requests per client, method and route with a token bucket kept in Redis.
+
+    The bucket is shared by all workers, so the limit holds for the whole deployment. Taking a token
+    runs as one Lua script, so it costs a single round-trip and concurrent requests cannot both take
+    the last token. If Redis is unreachable the request is let through and a warning is logged.
+
+    :param times: The number of requests allowed within the window.
+    :type times: int
+    :param seconds: The length of the window in seconds.
+    :type seconds: int
+
+    :raises HTTPException: If the client has exhausted the limit.
+    """
+
+    script = auth_service.cache.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def __init__(self, times: int, seconds: int):
+        """
+        Initialize the limiter with the allowed number of requests per window.
+
+        :param times: The number of requests allowed within the window.
+        :type times: int
+        :param seconds: The length of the window in seconds.
+        :type seconds: int
+        """
+        self.times = times
+        self.seconds = seconds
+        self.window_ms = seconds * 1000
+        self.refill_per_ms = repr(times / self.window_ms)
+
+    async def __call__(self, request: Request) -> None:
+        """
+        Take a token for the request and reject it if the client is over the limit.
+
+        :param request: The incoming HTTP request.
+        :type request: Request
+        :raises HTTPException: If the client has exhausted the limit.
+        """
+        route = request.scope.get("route")
+        path = route.path if route is not None else request.scope["path"]
+        client = request.client.host if request.client else "unknown"
+        key = f"tb:{request.method}:{path}:{client}"
+        now_ms = int(time.time() * 1000)
+        try:
+            allowed = await self.script(keys=[key], args=[self.times, self.refill_per_ms, now_ms, self.window_ms])
+        except RedisError as err:
+            logger.warning(f"Rate limit bucket unavailable: {err}")
+            return
+        if not allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too Many Requests",
+                headers={"Retry-After": str(self.seconds)},
+            )
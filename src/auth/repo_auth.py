@@ -1,16 +1,36 @@
+from functools import cache
+
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import Select, select, bindparam
+from sqlalchemy.exc import DBAPIError, IntegrityError
 from typing import Optional
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, joinedload
 from src.auth.schema_auth import UserCreate, RoleEnum
-from src.auth.password_utils import get_password_hash
+from src.auth.password_utils import get_password_hash_async
 from src.auth.models import User, Role
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+@cache
+def user_lookup_statement(column: str) -> Select:
+    """
+    Build, once per column, a user lookup statement with the role eagerly joined.
+
+    The statements take their value through a bind parameter named after the column, so the same
+    object is reused for every lookup. They are built on first use rather than at import, because
+    ``joinedload`` needs the mappers configured, which requires every model module to be imported.
+
+    :param column: The ``User`` column to look the user up by.
+    :type column: str
+    :return: The lookup statement.
+    :rtype: Select
+    """
+    return select(User).options(joinedload(User.role)).where(getattr(User, column) == bindparam(column))
+
+
 class UserRepository:
     def __init__(self, db: AsyncSession):
         """
@@ -21,15 +41,15 @@ class UserRepository:
         """
         self.db = db
 
-    async def handle_exception(self, e: Exception):
+    async def handle_exception(self, e: DBAPIError):
         """
-        Handles exceptions by rolling back the transaction and raising an HTTPException.
+        Handles database errors by logging them, rolling back the transaction and raising an HTTPException.
 
-        :param e: The exception to handle.
-        :type e: Exception
+        :param e: The database error to handle.
+        :type e: DBAPIError
         :raises HTTPException: Always raises a 500 Internal Server Error.
         """
-        print(f"Error: {e}")
+        logger.error(f"Database error: {e}", exc_info=e)
         await self.db.rollback()
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
@@ -44,10 +64,8 @@ class UserRepository:
         :raises HTTPException: If there is an error during the query.
         """
         try:
-            query = select(Role).where(Role.name == rolename)
-            result = await self.db.execute(query)
-            return result.scalar_one_or_none()
-        except Exception as e:
+            return await self.db.scalar(select(Role).where(Role.name == rolename))
+        except DBAPIError as e:
             await self.handle_exception(e)
 
     async def create_user(self, body: UserCreate) -> User:
@@ -58,10 +76,10 @@ class UserRepository:
         :type body: UserCreate
         :return: The created User object.
         :rtype: User
-        :raises HTTPException: If there is an error during user creation.
+        :raises HTTPException: If the username or email is already taken, or if there is an error during user creation.
         """
         try:
-            hashed_password = get_password_hash(body.password)
+            hashed_password = await get_password_hash_async(body.password)
             new_user = User(
                 username=body.username,
                 email=body.email,
@@ -72,7 +90,10 @@ class UserRepository:
             await self.db.commit()
             await self.db.refresh(new_user)
             return new_user
-        except Exception as e:
+        except IntegrityError:
+            await self.db.rollback()
+            raise HTTPException(status_code=400, detail="Username or email already registered")
+        except DBAPIError as e:
             await self.handle_exception(e)
 
     async def get_user(self, username: str) -> Optional[User]:
@@ -86,10 +107,9 @@ class UserRepository:
         :raises HTTPException: If there is an error during the query.
         """
         try:
-            stmt = select(User).where(User.username == username)
-            result = await self.db.execute(stmt)
-            return result.scalar_one_or_none()
-        except Exception as e:
+            result = await self.db.execute(user_lookup_statement("username"), {"username": username})
+            return result.unique().scalar_one_or_none()
+        except DBAPIError as e:
             logger.error(f"Error repo get_user: {e}")
             await self.handle_exception(e)
 
@@ -104,10 +124,8 @@ class UserRepository:
         :raises HTTPException: If there is an error during the query.
         """
         try:
-            stmt = select(User.email).where(User.username == username)
-            result = await self.db.execute(stmt)
-            return result.first()
-        except Exception as e:
+            return await self.db.scalar(select(User.email).where(User.username == username))
+        except DBAPIError as e:
             logger.error(f"Error repo get_email: {e}")
             await self.handle_exception(e)
 
@@ -122,13 +140,12 @@ class UserRepository:
         :raises HTTPException: If there is an error during the query.
         """
         try:
-            stmt = select(User).where(User.email == email)
-            result = await self.db.execute(stmt)
-            user = result.scalar_one_or_none()
+            result = await self.db.execute(user_lookup_statement("email"), {"email": email})
+            user = result.unique().scalar_one_or_none()
             if user:
                 logger.info(f"Fetched user from database: {user}")
             return user
-        except Exception as e:
+        except DBAPIError as e:
             logger.error(f"Error during database query: {e}")
             return None
 
@@ -145,7 +162,23 @@ class UserRepository:
         try:
             user.refresh_token = token
             await self.db.commit()
-        except Exception as e:
+        except DBAPIError as e:
+            await self.handle_exception(e)
+
+    async def update_password(self, user: User, hashed_password: str) -> None:
+        """
+        Replaces the stored password hash of a user.
+
+        :param user: The user whose password hash is to be replaced.
+        :type user: User
+        :param hashed_password: The new password hash.
+        :type hashed_password: str
+        :raises HTTPException: If there is an error during the update.
+        """
+        try:
+            user.hashed_password = hashed_password
+            await self.db.commit()
+        except DBAPIError as e:
             await self.handle_exception(e)
 
     async def confirmed_email(self, email: str) -> None:
@@ -163,7 +196,7 @@ class UserRepository:
                 await self.db.commit()
             else:
                 raise HTTPException(status_code=404, detail="User not found")
-        except Exception as e:
+        except DBAPIError as e:
             logger.error(f"Error during email confirmation: {e}")
             await self.handle_exception(e)
 
@@ -188,5 +221,5 @@ class UserRepository:
                 return user
             else:
                 raise HTTPException(status_code=404, detail="User not found")
-        except Exception as e:
+        except DBAPIError as e:
             await self.handle_exception(e)
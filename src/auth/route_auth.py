@@ -1,18 +1,16 @@
-import pickle
-
-from fastapi import APIRouter, HTTPException, Depends, status, Path, Query, UploadFile, File, BackgroundTasks, Request
+from fastapi import APIRouter, HTTPException, Depends, status, Path, Query, UploadFile, File, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi_limiter.depends import RateLimiter
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
+from functools import lru_cache
+from types import ModuleType
 
-import cloudinary
-import cloudinary.uploader
-
-from src.admin.emails import send_email
+from src.admin.emails import enqueue_email
 from src.auth.models import User
 from src.auth.schema_auth import Token, UserResponse, UserCreate, RequestEmail
-from src.auth.password_utils import verify_password
+from src.auth.password_utils import get_password_hash_async, password_needs_rehash
 from src.database.db import get_db
 from src.auth.repo_auth import UserRepository
 from src.auth.auth import auth_service
@@ -23,40 +21,56 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix='/auth', tags=['authentication'])
 
-cloudinary.config(
-    cloud_name=config.CLD_NAME,
-    api_key=config.CLD_API_KEY,
-    api_secret=config.CLD_API_SECRET,
-    secure=True,
+AVATAR_UPLOAD_CHUNK_SIZE = 6_000_000
+AVATAR_URL_TEMPLATE = (
+    "https://res.cloudinary.com/" + config.CLD_NAME + "/image/upload/c_fill,h_250,w_250/v{version}/{public_id}"
 )
 
 
+@lru_cache(maxsize=1)
+def get_cloudinary() -> ModuleType:
+    """
+    Imports and configures the Cloudinary SDK on first use, so workers that never
+    upload an avatar skip its import cost.
+
+    :return: The configured ``cloudinary`` package with its uploader and utils loaded.
+    :rtype: ModuleType
+    """
+    import cloudinary
+    import cloudinary.uploader
+    import cloudinary.utils
+
+    cloudinary.config(
+        cloud_name=config.CLD_NAME,
+        api_key=config.CLD_API_KEY,
+        api_secret=config.CLD_API_SECRET,
+        secure=True,
+    )
+    return cloudinary
+
+
 @router.post('/register', response_model=UserCreate, status_code=status.HTTP_201_CREATED)
-async def register(user_create: UserCreate, bt: BackgroundTasks, request: Request, db: AsyncSession = Depends(get_db)) -> UserCreate:
+async def register(user_create: UserCreate, request: Request, db: AsyncSession = Depends(get_db)) -> UserCreate:
     """
     Registers a new user.
 
     :param user_create: The user creation data.
     :type user_create: UserCreate
-    :param bt: Background tasks to be executed.
-    :type bt: BackgroundTasks
     :param request: The incoming HTTP request.
     :type request: Request
     :param db: Database session dependency.
     :type db: AsyncSession
     :return: The created user.
     :rtype: UserCreate
-    :raises HTTPException: If the username is already registered or if an internal server error occurs.
+    :raises HTTPException: If the username or email is already registered or if an internal server error occurs.
     """
     try:
         user_repo = UserRepository(db)
-        existing_user = await user_repo.get_user(user_create.username)
-        if existing_user:
-            raise HTTPException(status_code=400, detail="Username already registered")
-
         new_user = await user_repo.create_user(user_create)
-        bt.add_task(send_email, new_user.email, new_user.username, str(request.base_url))
+        await enqueue_email(new_user.email, new_user.username, str(request.base_url))
         return new_user
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error during registration: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -78,15 +92,19 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
     try:
         user_repo = UserRepository(db)
         user = await user_repo.get_user(form_data.username)
-        if not user or not verify_password(form_data.password, user.hashed_password):
+        if not user or not await auth_service.verify_password(form_data.password, user.hashed_password):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect username or password",
                 headers={"WWW-Authenticate": "Bearer"},
             )
-        access_token = auth_service.create_access_token(data={"sub": user.email})
-        refresh_token = auth_service.create_refresh_token(data={"sub": user.email})
+        if password_needs_rehash(user.hashed_password):
+            await user_repo.update_password(user, await get_password_hash_async(form_data.password))
+        access_token = auth_service.issue_access_token(user.email)
+        refresh_token = await auth_service.issue_refresh_token(user.email)
         return Token(access_token=access_token, refresh_token=refresh_token, token_type="bearer")
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error during login: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -103,28 +121,15 @@ async def refresh_token(refresh_token: str, db: AsyncSession = Depends(get_db))
     :type db: AsyncSession
     :return: A dictionary containing new access token, refresh token, and token type.
     :rtype: Token
-    :raises HTTPException: If the refresh token is invalid or if an internal server error occurs.
+    :raises HTTPException: If the refresh token is invalid or already used, or if an internal server error occurs.
     """
     try:
-        token_data = auth_service.decode_refresh_token(refresh_token)
-        logger.info(f"Token data: {token_data}")
-        if token_data is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid refresh token",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        user_repo = UserRepository(db)
-        user = await user_repo.get_user(token_data.username)
-        if user is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid refresh token",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        access_token = auth_service.create_access_token(data={"sub": user.email})
-        refresh_token = auth_service.create_refresh_token(data={"sub": user.email})
+        email = await auth_service.redeem_refresh_token(refresh_token, db)
+        access_token = auth_service.issue_access_token(email)
+        refresh_token = await auth_service.issue_refresh_token(email)
         return Token(access_token=access_token, refresh_token=refresh_token, token_type="bearer")
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error during refresh token: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -147,15 +152,15 @@ async def confirmed_email(token: str, db: AsyncSession = Depends(get_db)) -> dic
         logger.info(f"Received token for confirmation: {token}")
         email = auth_service.get_email_from_token(token)
         logger.info(f"Decoded email from token: {email}")
-        user_repo = UserRepository(db)
-        user = await user_repo.get_user_by_email(email)
+        user = await auth_service.find_user(email, db)
         if user is None:
             logger.error(f"User not found for email: {email}")
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Verification error")
         if user.is_active:
             logger.info(f"Email already confirmed for user: {user.email}")
             return {"message": "Your email is already confirmed"}
-        await user_repo.confirmed_email(email)
+        await UserRepository(db).confirmed_email(email)
+        await auth_service.evict_user(email)
         logger.info(f"Email confirmed for user: {user.email}")
         return {"message": "Email confirmed"}
     except Exception as e:
@@ -196,15 +201,17 @@ async def create_avatar(
     :raises HTTPException: If an error occurs during avatar creation.
     """
     try:
+        cloudinary = get_cloudinary()
         public_id = f"CM API/{user.email}"
         user_repo = UserRepository(db)
-        res = cloudinary.uploader.upload(file.file, public_id=public_id, overwrite=True)
-        res_url = cloudinary.CloudinaryImage(public_id).build_url(
-            width=250, height=250, crop="fill", version=res.get("version")
+        await file.seek(0)
+        res = await run_in_threadpool(
+            cloudinary.uploader.upload_large, file.file, public_id=public_id, overwrite=True,
+            chunk_size=AVATAR_UPLOAD_CHUNK_SIZE, filename=file.filename,
         )
+        res_url = AVATAR_URL_TEMPLATE.format(version=res.get("version"), public_id=cloudinary.utils.smart_escape(public_id))
         user = await user_repo.create_avatar_url(user.email, res_url)
-        auth_service.cache.set(user.email, pickle.dumps(user))
-        auth_service.cache.expire(user.email, 300)
+        await auth_service.cache_user(user)
         return user
     except Exception as e:
         logger.error(f"Error during avatar creation: {e}")
@@ -214,7 +221,6 @@ async def create_avatar(
 @router.post('/request_email')
 async def request_email(
         body: RequestEmail,
-        background_tasks: BackgroundTasks,
         request: Request,
         db: AsyncSession = Depends(get_db)
 ) -> dict:
@@ -223,8 +229,6 @@ async def request_email(
 
     :param body: The request body containing the user's email.
     :type body: RequestEmail
-    :param background_tasks: Background tasks to be executed.
-    :type background_tasks: BackgroundTasks
     :param request: The incoming HTTP request.
     :type request: Request
     :param db: Database session dependency.
@@ -233,11 +237,10 @@ async def request_email(
     :rtype: dict
     :raises HTTPException: If an internal server error occurs.
     """
-    user_repo = UserRepository(db)
-    user = await user_repo.get_user_by_email(body.email)
+    user = await auth_service.find_user(body.email, db)
 
-    if user.is_active:
+    if user and user.is_active:
         return {"message": "Your email is already confirmed"}
     if user:
-        background_tasks.add_task(send_email, user.email, user.username, str(request.base_url))
+        await enqueue_email(user.email, user.username, str(request.base_url))
     return {"message": "Check your email for confirmation."}
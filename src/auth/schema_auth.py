@@ -1,6 +1,6 @@
 from typing import Optional
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr
 from enum import Enum
 
 from src.admin.schemas_admin import RoleResponse
@@ -23,8 +23,7 @@ class UserResponse(UserSchema):
     avatar: Optional[str] = None
     role: Optional[RoleResponse] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class Token(BaseModel):
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from typing import Any, Optional
 from pydantic import field_validator
 from dotenv import load_dotenv
@@ -10,7 +11,15 @@ load_dotenv()
 class Settings(BaseSettings):
     DB_URL: str
     DB_TEST_URL: str
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 40
+    DB_POOL_TIMEOUT: int = 10
+    DB_POOL_RECYCLE: int = 1800
+    DB_USE_NULL_POOL: bool = False
     SECRET_KEY_JWT: str
+    ARGON2_TIME_COST: int = 2
+    ARGON2_MEMORY_COST: int = 65536
+    ARGON2_PARALLELISM: int = 1
     ALGORITHM: str
     MAIL_USERNAME: str
     MAIL_PASSWORD: str
@@ -35,8 +44,28 @@ class Settings(BaseSettings):
             raise ValueError("algorithm must be HS256 or HS512")
         return v
 
+    @field_validator("ARGON2_TIME_COST", "ARGON2_PARALLELISM")
+    @classmethod
+    def validate_argon2_cost(cls, v: Any):
+        if v < 1:
+            raise ValueError("argon2 time cost and parallelism must be at least 1")
+        return v
+
     # model_config = ConfigDict(extra='ignore', env_file=".env", env_file_encoding="utf-8")  # noqa
 
 
-config = Settings()
 
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Returns the application settings, reading the environment only on the first call.
+
+    Can be used as a FastAPI dependency: ``settings: Settings = Depends(get_settings)``.
+
+    :return: The application settings.
+    :rtype: Settings
+    """
+    return Settings()
+
+
+config = get_settings()
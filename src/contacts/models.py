@@ -1,38 +1,83 @@
-from sqlalchemy import String, Integer, Date, ForeignKey, Boolean
+from sqlalchemy import String, Integer, Date, ForeignKey, Boolean, Index, DDL, event, extract, cast, literal
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 
 from src.auth.models import User
 
 from src.database.db import Base
 
+# The trigram indexes below need the extension to exist before create_all builds them.
+event.listen(Base.metadata, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
+
+def trigram_index(name: str, column: str) -> Index:
+    """
+    Declares a GIN trigram index, which serves ``ILIKE '%...%'`` searches on the column.
+
+    :param name: The index name.
+    :type name: str
+    :param column: The indexed column.
+    :type column: str
+    :return: The index.
+    :rtype: Index
+    """
+    return Index(name, column, postgresql_using="gin", postgresql_ops={column: "gin_trgm_ops"})
+
+
+def birthday_key(birthday):
+    """
+    Builds the year-independent ``month * 100 + day`` key of a date column, used to find upcoming birthdays.
+
+    :param birthday: The date column.
+    :type birthday: ColumnElement[date]
+    :return: The integer key expression.
+    :rtype: ColumnElement[int]
+    """
+    # The multiplier is rendered inline, not sent as a parameter, so queries match the index expression.
+    return cast(extract("month", birthday) * literal(100, literal_execute=True) + extract("day", birthday), Integer)
+
 
 class Contact(Base):
     __tablename__ = 'contacts'
+    __table_args__ = (
+        trigram_index("ix_contacts_firstname_trgm", "firstname"),
+        trigram_index("ix_contacts_lastname_trgm", "lastname"),
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     firstname: Mapped[str] = mapped_column(String, index=True)
     lastname: Mapped[str] = mapped_column(String, index=True)
     birthday: Mapped[Date] = mapped_column(Date)
     description: Mapped[str | None] = mapped_column(String, nullable=True)
-    emails: Mapped[list["Email"]] = relationship("Email", back_populates="contact")
-    phones: Mapped[list["Phone"]] = relationship("Phone", back_populates="contact")
+    # Loaded with one IN query per page by default, so a contact loaded without explicit
+    # options never falls back to per-row lazy loads (which fail outright under asyncio).
+    emails: Mapped[list["Email"]] = relationship("Email", back_populates="contact", lazy="selectin",
+                                                 passive_deletes=True)
+    phones: Mapped[list["Phone"]] = relationship("Phone", back_populates="contact", lazy="selectin",
+                                                 passive_deletes=True)
     owner_id: Mapped[int] = mapped_column(Integer, ForeignKey('users.id'), nullable=True)
 
     owner: Mapped["User"] = relationship("User", back_populates="contacts")
 
 
+Index("ix_contacts_owner_id_id", Contact.owner_id, Contact.id)
+Index("ix_contacts_owner_birthday_key", Contact.owner_id, birthday_key(Contact.birthday))
+Index("ix_contacts_birthday_key", birthday_key(Contact.birthday))
+
+
 class Email(Base):
     __tablename__ = 'emails'
+    __table_args__ = (trigram_index("ix_emails_email_trgm", "email"),)
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     email: Mapped[str] = mapped_column(String, unique=True, index=True)
-    contact_id: Mapped[int] = mapped_column(Integer, ForeignKey('contacts.id'))
+    contact_id: Mapped[int] = mapped_column(Integer, ForeignKey('contacts.id', ondelete='CASCADE'), index=True)
 
     contact: Mapped["Contact"] = relationship("Contact", back_populates="emails")
 
 
 class Phone(Base):
     __tablename__ = 'phones'
+    __table_args__ = (trigram_index("ix_phones_phone_trgm", "phone"),)
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     phone: Mapped[str] = mapped_column(String, index=True)
-    contact_id: Mapped[int] = mapped_column(Integer, ForeignKey('contacts.id'))
+    contact_id: Mapped[int] = mapped_column(Integer, ForeignKey('contacts.id', ondelete='CASCADE'), index=True)
 
     contact: Mapped["Contact"] = relationship("Contact", back_populates="phones")
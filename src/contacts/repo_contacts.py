@@ -1,10 +1,17 @@
-from datetime import datetime, timedelta
+import logging
+
 from fastapi import HTTPException
-from sqlalchemy import select, delete, or_
+from sqlalchemy import select, delete, insert, update, and_, or_, func, lambda_stmt
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
-from src.contacts.models import Contact, Email, Phone
+from sqlalchemy.orm import joinedload, selectinload
+from src.contacts.models import Contact, Email, Phone, birthday_key
 from src.contacts.schema_contacts import ContactUpdateSchema, ContactCreate
 
+logger = logging.getLogger(__name__)
+
+SEARCH_LIMIT = 50
+
 
 class ContactRepository:
     def __init__(self, db: AsyncSession):
@@ -16,39 +23,225 @@ class ContactRepository:
         """
         self.db = db
 
-    async def handle_exception(self, e):
+    async def handle_exception(self, e: SQLAlchemyError, rollback: bool = True):
         """
-        Handles exceptions by printing the error message, rolling back the transaction, and raising an HTTPException.
+        Handles database errors by logging them, rolling back the transaction if needed, and raising an HTTPException.
+
+        Only database errors come through here; HTTPExceptions raised by the methods, such as a 404
+        for a missing contact, propagate unchanged.
 
-        :param e: The exception to handle.
-        :type e: Exception
+        :param e: The database error to handle.
+        :type e: SQLAlchemyError
+        :param rollback: Whether to roll back first. Read-only methods pass False: they wrote nothing,
+            and the session is rolled back when it is closed at the end of the request anyway.
+        :type rollback: bool
         :raises HTTPException: Always raises an HTTPException with a 500 status code.
         """
-        print(f"Error: {e}")
-        await self.db.rollback()
+        logger.error(f"Database error: {e}", exc_info=e)
+        if rollback:
+            await self.db.rollback()
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
-    async def get_all_contacts(self, limit: int, offset: int):
+    @staticmethod
+    def select_contacts():
+        """
+        Builds a contact query that loads the emails and phones of all matched contacts in two extra queries.
+
+        Lookups whose parameters are plain arguments wrap the query in ``lambda_stmt``, so the statement
+        is built and its cache key computed once. Search queries compute their pattern in Python and are
+        built per call instead: a lambda would freeze that value at the first call.
+
+        :return: The select statement for contacts with their emails and phones.
+        :rtype: Select
+        """
+        return select(Contact).options(selectinload(Contact.emails), selectinload(Contact.phones))
+
+    @staticmethod
+    def select_contact():
+        """
+        Builds a single-contact query that loads its emails and phones in the same statement.
+
+        Joined loading repeats the contact row for every email and phone pair, which is cheap for
+        one contact but not for a page of them, so listings use :meth:`select_contacts` instead.
+        Results of this query must be deduplicated with ``unique()``.
+
+        :return: The select statement for a contact with its emails and phones.
+        :rtype: Select
         """
-        Retrieves all contacts with pagination.
+        return select(Contact).options(joinedload(Contact.emails), joinedload(Contact.phones))
+
+    @staticmethod
+    def select_contact_rows():
+        """
+        Builds a contact query that returns plain column values, with the emails and phones of each
+        contact aggregated into arrays in SQL, for list responses that do not need ORM instances.
+
+        Rows from this query are turned into response dicts by :meth:`contact_rows`.
+
+        :return: The select statement for contact rows.
+        :rtype: Select
+        """
+        emails = select(func.array_agg(Email.email)).where(Email.contact_id == Contact.id).scalar_subquery()
+        phones = select(func.array_agg(Phone.phone)).where(Phone.contact_id == Contact.id).scalar_subquery()
+        return select(
+            Contact.id, Contact.firstname, Contact.lastname, Contact.birthday, Contact.description,
+            emails.label("emails"), phones.label("phones"),
+        )
+
+    @staticmethod
+    def contact_rows(result) -> list[dict]:
+        """
+        Converts the rows of a :meth:`select_contact_rows` query into dicts shaped like ``ContactResponse``.
+
+        :param result: The result of the query.
+        :type result: Result
+        :return: The contacts as dicts.
+        :rtype: list[dict]
+        """
+        return [
+            {
+                **row,
+                "emails": [{"email": email} for email in row["emails"] or []],
+                "phones": [{"phone": phone} for phone in row["phones"] or []],
+            }
+            for row in result.mappings().all()
+        ]
+
+    @staticmethod
+    def search_filter(query: str):
+        """
+        Builds the condition matching contacts whose name, email or phone contains the query.
+
+        Every ``ILIKE`` is served by a trigram GIN index, and the email and phone matches are
+        uncorrelated ``IN`` subqueries, so the planner can combine index scans instead of
+        scanning the contacts table.
+
+        ``%`` and ``_`` in the query are matched literally, not as wildcards.
+
+        :param query: The query string to search for.
+        :type query: str
+        :return: The search condition.
+        :rtype: ColumnElement[bool]
+        """
+        escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        pattern = f"%{escaped}%"
+        return or_(
+            Contact.firstname.ilike(pattern, escape="\\"),
+            Contact.lastname.ilike(pattern, escape="\\"),
+            Contact.id.in_(select(Email.contact_id).where(Email.email.ilike(pattern, escape="\\"))),
+            Contact.id.in_(select(Phone.contact_id).where(Phone.phone.ilike(pattern, escape="\\"))),
+        )
+
+    @staticmethod
+    def upcoming_birthdays_filter(days: int = 7):
+        """
+        Builds the condition matching contacts whose birthday falls within the next ``days`` days, in any year.
+
+        The window starts at the database's ``CURRENT_DATE``, so it does not depend on the
+        application server's clock or time zone. The condition compares the indexed
+        ``month * 100 + day`` key of the birthday, and wraps around the end of the year.
+
+        :param days: The number of days to look ahead.
+        :type days: int
+        :return: The birthday condition.
+        :rtype: ColumnElement[bool]
+        """
+        start_key = birthday_key(func.current_date())
+        end_key = birthday_key(func.current_date() + days)
+        key = birthday_key(Contact.birthday)
+        return or_(
+            and_(start_key <= end_key, key.between(start_key, end_key)),
+            and_(start_key > end_key, or_(key >= start_key, key <= end_key)),
+        )
+
+    async def get_contacts(self, limit: int, offset: int, owner_id: int, cursor: int | None = None):
+        """
+        Retrieves the contacts of a specific owner with pagination, ordered by ID.
+
+        With a ``cursor`` the page starts right after that contact ID and ``offset`` is ignored,
+        so the database seeks into the ``(owner_id, id)`` index instead of skipping rows.
 
         :param limit: The maximum number of contacts to return.
         :type limit: int
         :param offset: The number of contacts to skip before starting to collect results.
         :type offset: int
+        :param owner_id: The ID of the owner of the contacts.
+        :type owner_id: int
+        :param cursor: The ID of the last contact of the previous page.
+        :type cursor: int | None
         :return: A list of contacts.
         :rtype: list[Contact]
         :raises HTTPException: If an error occurs while retrieving the contacts.
         """
         try:
-            stmt = select(Contact).offset(offset).limit(limit)
+            if cursor is None:
+                stmt = lambda_stmt(lambda: ContactRepository.select_contacts().where(Contact.owner_id == owner_id)
+                                   .order_by(Contact.id).offset(offset).limit(limit))
+            else:
+                stmt = lambda_stmt(lambda: ContactRepository.select_contacts()
+                                   .where(Contact.owner_id == owner_id, Contact.id > cursor)
+                                   .order_by(Contact.id).limit(limit))
             result = await self.db.execute(stmt)
-            contacts = result.scalars().all()
-            for contact in contacts:
-                await self.db.refresh(contact, ['emails', 'phones'])
-            return contacts
-        except Exception as e:
-            await self.handle_exception(e)
+            return result.scalars().all()
+        except SQLAlchemyError as e:
+            await self.handle_exception(e, rollback=False)
+
+    async def get_contacts_projection(self, limit: int, offset: int, owner_id: int, cursor: int | None = None):
+        """
+        Same page as :meth:`get_contacts`, fetched as plain column values without building ORM instances.
+
+        :param limit: The maximum number of contacts to return.
+        :type limit: int
+        :param offset: The number of contacts to skip before starting to collect results.
+        :type offset: int
+        :param owner_id: The ID of the owner of the contacts.
+        :type owner_id: int
+        :param cursor: The ID of the last contact of the previous page.
+        :type cursor: int | None
+        :return: A list of dicts shaped like ``ContactResponse``.
+        :rtype: list[dict]
+        :raises HTTPException: If an error occurs while retrieving the contacts.
+        """
+        try:
+            if cursor is None:
+                stmt = lambda_stmt(lambda: ContactRepository.select_contact_rows().where(Contact.owner_id == owner_id)
+                                   .order_by(Contact.id).offset(offset).limit(limit))
+            else:
+                stmt = lambda_stmt(lambda: ContactRepository.select_contact_rows()
+                                   .where(Contact.owner_id == owner_id, Contact.id > cursor)
+                                   .order_by(Contact.id).limit(limit))
+            result = await self.db.execute(stmt)
+            return self.contact_rows(result)
+        except SQLAlchemyError as e:
+            await self.handle_exception(e, rollback=False)
+
+    async def get_all_contacts(self, limit: int, offset: int, cursor: int | None = None):
+        """
+        Retrieves all contacts with pagination, ordered by ID.
+
+        With a ``cursor`` the page starts right after that contact ID and ``offset`` is ignored.
+
+        :param limit: The maximum number of contacts to return.
+        :type limit: int
+        :param offset: The number of contacts to skip before starting to collect results.
+        :type offset: int
+        :param cursor: The ID of the last contact of the previous page.
+        :type cursor: int | None
+        :return: A list of contacts.
+        :rtype: list[Contact]
+        :raises HTTPException: If an error occurs while retrieving the contacts.
+        """
+        try:
+            if cursor is None:
+                stmt = lambda_stmt(lambda: ContactRepository.select_contacts()
+                                   .order_by(Contact.id).offset(offset).limit(limit))
+            else:
+                stmt = lambda_stmt(lambda: ContactRepository.select_contacts()
+                                   .where(Contact.id > cursor).order_by(Contact.id).limit(limit))
+            result = await self.db.execute(stmt)
+            return result.scalars().all()
+        except SQLAlchemyError as e:
+            await self.handle_exception(e, rollback=False)
 
     async def get_contact(self, contact_id: int, owner_id: int):
         """
@@ -63,15 +256,15 @@ class ContactRepository:
         :raises HTTPException: If the contact is not found.
         """
         try:
-            stmt = select(Contact).where(Contact.id == contact_id, Contact.owner_id == owner_id)
+            stmt = lambda_stmt(lambda: ContactRepository.select_contact()
+                               .where(Contact.id == contact_id, Contact.owner_id == owner_id))
             result = await self.db.execute(stmt)
-            contact = result.scalar_one_or_none()
+            contact = result.unique().scalar_one_or_none()
             if contact is None:
                 raise HTTPException(status_code=404, detail="Contact not found")
-            await self.db.refresh(contact, ['emails', 'phones'])
             return contact
-        except Exception as e:
-            await self.handle_exception(e)
+        except SQLAlchemyError as e:
+            await self.handle_exception(e, rollback=False)
 
     async def create_contact(self, body: ContactCreate, owner_id: int):
         """
@@ -91,27 +284,17 @@ class ContactRepository:
                 lastname=body.lastname,
                 birthday=body.birthday,
                 description=body.description,
-                owner_id=owner_id
+                owner_id=owner_id,
+                emails=[Email(email=email_data.email) for email_data in body.emails or []],
+                phones=[Phone(phone=phone_data.phone) for phone_data in body.phones or []],
             )
 
+            # The session keeps loaded state on commit, so the new rows and their ids
+            # (filled in by INSERT ... RETURNING) are returned without a reload.
             self.db.add(contact)
             await self.db.commit()
-            await self.db.refresh(contact)
-
-            if body.emails:
-                for email_data in body.emails:
-                    email = Email(email=email_data.email, contact_id=contact.id)
-                    self.db.add(email)
-
-            if body.phones:
-                for phone_data in body.phones:
-                    phone = Phone(phone=phone_data.phone, contact_id=contact.id)
-                    self.db.add(phone)
-
-            await self.db.commit()
-            await self.db.refresh(contact, ['emails', 'phones'])
             return contact
-        except Exception as e:
+        except SQLAlchemyError as e:
             await self.handle_exception(e)
 
     async def update_contact(self, contact_id: int, body: ContactUpdateSchema, owner_id: int):
@@ -129,61 +312,80 @@ class ContactRepository:
         :raises HTTPException: If the contact is not found or if an error occurs while updating the contact.
         """
         try:
-            stmt = select(Contact).where(Contact.id == contact_id, Contact.owner_id == owner_id)
+            stmt = update(Contact).where(Contact.id == contact_id, Contact.owner_id == owner_id).values(
+                firstname=body.firstname,
+                lastname=body.lastname,
+                birthday=body.birthday,
+                description=body.description,
+            ).returning(Contact.id)
             result = await self.db.execute(stmt)
-            contact = result.scalar_one_or_none()
-            if contact is None:
+            if result.scalar_one_or_none() is None:
                 raise HTTPException(status_code=404, detail="Contact not found")
 
-            contact.firstname = body.firstname
-            contact.lastname = body.lastname
-            contact.birthday = body.birthday
-            contact.description = body.description
-
             if body.emails is not None:
-                await self.db.execute(delete(Email).where(Email.contact_id == contact_id))
-                for email_data in body.emails:
-                    email = Email(email=email_data.email, contact_id=contact.id)
-                    self.db.add(email)
+                await self.sync_children(Email.email, contact_id, {email_data.email for email_data in body.emails})
 
             if body.phones is not None:
-                await self.db.execute(delete(Phone).where(Phone.contact_id == contact_id))
-                for phone_data in body.phones:
-                    phone = Phone(phone=phone_data.phone, contact_id=contact.id)
-                    self.db.add(phone)
+                await self.sync_children(Phone.phone, contact_id, {phone_data.phone for phone_data in body.phones})
 
             await self.db.commit()
-            await self.db.refresh(contact, ['emails', 'phones'])
-            return contact
-        except Exception as e:
+
+            stmt = lambda_stmt(lambda: ContactRepository.select_contact()
+                               .where(Contact.id == contact_id, Contact.owner_id == owner_id))
+            # The contact may already be in the session's identity map with its old emails and phones.
+            result = await self.db.execute(stmt, execution_options={"populate_existing": True})
+            return result.unique().scalar_one()
+        except SQLAlchemyError as e:
             await self.handle_exception(e)
 
+    async def sync_children(self, column, contact_id: int, values: set[str]):
+        """
+        Makes the emails or phones of a contact match the given values.
+
+        Only the rows whose value is no longer listed are deleted, and only the new values are
+        inserted, so resubmitting an unchanged list writes nothing.
+
+        :param column: The value column of the child table, ``Email.email`` or ``Phone.phone``.
+        :type column: InstrumentedAttribute[str]
+        :param contact_id: The ID of the contact the rows belong to.
+        :type contact_id: int
+        :param values: The values the contact should have after the call.
+        :type values: set[str]
+        """
+        model = column.class_
+        result = await self.db.execute(select(column).where(model.contact_id == contact_id))
+        current = set(result.scalars().all())
+
+        to_remove = current - values
+        if to_remove:
+            await self.db.execute(delete(model).where(model.contact_id == contact_id, column.in_(to_remove)))
+
+        to_add = values - current
+        if to_add:
+            await self.db.execute(insert(model), [{column.key: value, "contact_id": contact_id} for value in to_add])
+
     async def delete_contact(self, contact_id: int, owner_id: int):
         """
-        Deletes a contact by its ID and owner ID.
+        Deletes a contact by its ID and owner ID, together with its emails and phones.
+
+        The emails and phones are removed by the database through ``ON DELETE CASCADE``,
+        so the whole operation is a single statement.
 
         :param contact_id: The ID of the contact to delete.
         :type contact_id: int
         :param owner_id: The ID of the owner of the contact.
         :type owner_id: int
-        :return: The deleted contact.
-        :rtype: Contact
-        :raises HTTPException: If the contact is not found or if an error occurs while deleting the contact.
+        :return: The ID of the deleted contact, or None if the owner has no such contact.
+        :rtype: int | None
+        :raises HTTPException: If an error occurs while deleting the contact.
         """
         try:
-            stmt = select(Contact).where(Contact.id == contact_id, Contact.owner_id == owner_id)
+            stmt = delete(Contact).where(Contact.id == contact_id, Contact.owner_id == owner_id).returning(Contact.id)
             result = await self.db.execute(stmt)
-            contact = result.scalar_one_or_none()
-            if contact is None:
-                raise HTTPException(status_code=404, detail="Contact not found")
-
-            await self.db.execute(delete(Email).where(Email.contact_id == contact_id))
-            await self.db.execute(delete(Phone).where(Phone.contact_id == contact_id))
-            await self.db.execute(delete(Contact).where(Contact.id == contact_id))
+            deleted_id = result.scalar_one_or_none()
             await self.db.commit()
-
-            return contact
-        except Exception as e:
+            return deleted_id
+        except SQLAlchemyError as e:
             await self.handle_exception(e)
 
     async def get_birthdays(self, limit: int, offset: int, owner_id: int):
@@ -201,19 +403,36 @@ class ContactRepository:
         :raises HTTPException: If an error occurs while retrieving the contacts.
         """
         try:
-            today = datetime.now().date()
-            future_date = today + timedelta(days=7)
+            stmt = lambda_stmt(lambda: ContactRepository.select_contacts()
+                               .where(Contact.owner_id == owner_id, ContactRepository.upcoming_birthdays_filter())
+                               .offset(offset).limit(limit))
+            result = await self.db.execute(stmt)
+            return result.scalars().all()
+        except SQLAlchemyError as e:
+            await self.handle_exception(e, rollback=False)
+
+    async def get_birthdays_projection(self, limit: int, offset: int, owner_id: int):
+        """
+        Same page as :meth:`get_birthdays`, fetched as plain column values without building ORM instances.
 
-            stmt = select(Contact).where(Contact.owner_id == owner_id,
-                                         Contact.birthday.between(today, future_date)).offset(
-                offset).limit(limit)
+        :param limit: The maximum number of contacts to return.
+        :type limit: int
+        :param offset: The number of contacts to skip before starting to collect results.
+        :type offset: int
+        :param owner_id: The ID of the owner of the contacts.
+        :type owner_id: int
+        :return: A list of dicts shaped like ``ContactResponse``.
+        :rtype: list[dict]
+        :raises HTTPException: If an error occurs while retrieving the contacts.
+        """
+        try:
+            stmt = lambda_stmt(lambda: ContactRepository.select_contact_rows()
+                               .where(Contact.owner_id == owner_id, ContactRepository.upcoming_birthdays_filter())
+                               .offset(offset).limit(limit))
             result = await self.db.execute(stmt)
-            contacts = result.scalars().all()
-            for contact in contacts:
-                await self.db.refresh(contact, ['emails', 'phones'])
-            return contacts
-        except Exception as e:
-            await self.handle_exception(e)
+            return self.contact_rows(result)
+        except SQLAlchemyError as e:
+            await self.handle_exception(e, rollback=False)
 
     async def get_all_birthdays(self, limit: int, offset: int):
         """
@@ -228,20 +447,34 @@ class ContactRepository:
         :raises HTTPException: If an error occurs while retrieving the contacts.
         """
         try:
-            today = datetime.now().date()
-            future_date = today + timedelta(days=7)
+            stmt = lambda_stmt(lambda: ContactRepository.select_contacts()
+                               .where(ContactRepository.upcoming_birthdays_filter()).offset(offset).limit(limit))
+            result = await self.db.execute(stmt)
+            return result.scalars().all()
+        except SQLAlchemyError as e:
+            await self.handle_exception(e, rollback=False)
+
+    async def get_all_birthdays_projection(self, limit: int, offset: int):
+        """
+        Same page as :meth:`get_all_birthdays`, fetched as plain column values without building ORM instances.
 
-            stmt = select(Contact).where(Contact.birthday.between(today, future_date)).offset(
-                offset).limit(limit)
+        :param limit: The maximum number of contacts to return.
+        :type limit: int
+        :param offset: The number of contacts to skip before starting to collect results.
+        :type offset: int
+        :return: A list of dicts shaped like ``ContactResponse``.
+        :rtype: list[dict]
+        :raises HTTPException: If an error occurs while retrieving the contacts.
+        """
+        try:
+            stmt = lambda_stmt(lambda: ContactRepository.select_contact_rows()
+                               .where(ContactRepository.upcoming_birthdays_filter()).offset(offset).limit(limit))
             result = await self.db.execute(stmt)
-            contacts = result.scalars().all()
-            for contact in contacts:
-                await self.db.refresh(contact, ['emails', 'phones'])
-            return contacts
-        except Exception as e:
-            await self.handle_exception(e)
+            return self.contact_rows(result)
+        except SQLAlchemyError as e:
+            await self.handle_exception(e, rollback=False)
 
-    async def search_contacts(self, query: str, owner_id: int):
+    async def search_contacts(self, query: str, owner_id: int, limit: int = SEARCH_LIMIT):
         """
         Searches for contacts based on a query string and owner ID.
 
@@ -249,46 +482,35 @@ class ContactRepository:
         :type query: str
         :param owner_id: The ID of the owner of the contacts.
         :type owner_id: int
-        :return: A list of contacts matching the search query.
+        :param limit: The maximum number of contacts to return.
+        :type limit: int
+        :return: A list of contacts matching the search query, ordered by ID.
         :rtype: list[Contact]
         :raises HTTPException: If an error occurs while searching for contacts.
         """
         try:
-            stmt = select(Contact).where(Contact.owner_id == owner_id).filter(or_(
-                Contact.firstname.ilike(f"%{query}%"),
-                Contact.lastname.ilike(f"%{query}%"),
-                Contact.emails.any(Email.email.ilike(f"%{query}%")),
-                Contact.phones.any(Phone.phone.ilike(f"%{query}%"))
-            ))
+            stmt = (self.select_contacts().where(Contact.owner_id == owner_id, self.search_filter(query))
+                    .order_by(Contact.id).limit(limit))
             result = await self.db.execute(stmt)
-            contacts = result.scalars().all()
-            for contact in contacts:
-                await self.db.refresh(contact, ['emails', 'phones'])
-            return contacts
-        except Exception as e:
-            await self.handle_exception(e)
+            return result.scalars().all()
+        except SQLAlchemyError as e:
+            await self.handle_exception(e, rollback=False)
 
-    async def search_all_contacts(self, query: str):
+    async def search_all_contacts(self, query: str, limit: int = SEARCH_LIMIT):
         """
         Searches for all contacts based on a query string.
 
         :param query: The query string to search for.
         :type query: str
-        :return: A list of contacts matching the search query.
+        :param limit: The maximum number of contacts to return.
+        :type limit: int
+        :return: A list of contacts matching the search query, ordered by ID.
         :rtype: list[Contact]
         :raises HTTPException: If an error occurs while searching for contacts.
         """
         try:
-            stmt = select(Contact).filter(or_(
-                Contact.firstname.ilike(f"%{query}%"),
-                Contact.lastname.ilike(f"%{query}%"),
-                Contact.emails.any(Email.email.ilike(f"%{query}%")),
-                Contact.phones.any(Phone.phone.ilike(f"%{query}%"))
-            ))
+            stmt = self.select_contacts().where(self.search_filter(query)).order_by(Contact.id).limit(limit)
             result = await self.db.execute(stmt)
-            contacts = result.scalars().all()
-            for contact in contacts:
-                await self.db.refresh(contact, ['emails', 'phones'])
-            return contacts
-        except Exception as e:
-            await self.handle_exception(e)
+            return result.scalars().all()
+        except SQLAlchemyError as e:
+            await self.handle_exception(e, rollback=False)
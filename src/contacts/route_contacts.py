@@ -1,36 +1,41 @@
-from datetime import datetime, date
-
 from fastapi import APIRouter, HTTPException, Depends, status, Query
-from fastapi_limiter.depends import RateLimiter
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.auth.models import User
 from src.auth.schema_auth import RoleEnum
 from src.admin.roles import RoleChecker
 from src.auth.auth import auth_service
+from src.auth.rate_limiter import TokenBucketRateLimiter
 
 from src.database.db import get_db
-from src.contacts.repo_contacts import ContactRepository
+from src.contacts.repo_contacts import ContactRepository, SEARCH_LIMIT
 from src.contacts.schema_contacts import ContactUpdateSchema, ContactResponse, ContactCreate
 
 router = APIRouter(prefix='/contacts', tags=['contacts'])
 
+# One role checker and one limiter shared by every route; the limiter still keeps a separate
+# bucket per route, since it keys buckets by method and route template.
+CONTACT_ROLES = [RoleEnum.USER, RoleEnum.ADMIN, RoleEnum.MODERATOR]
+CONTACT_DEPENDENCIES = [Depends(RoleChecker(CONTACT_ROLES)), Depends(TokenBucketRateLimiter(times=5, seconds=60))]
+
 
 @router.get("/", response_model=list[ContactResponse], description='No more than 10 requests per minute',
-            dependencies=[Depends(RoleChecker([RoleEnum.USER, RoleEnum.ADMIN, RoleEnum.MODERATOR])),
-                          Depends(RateLimiter(times=5, seconds=60))])
+            dependencies=CONTACT_DEPENDENCIES)
 async def get_contacts(
         limit: int = Query(10, ge=1, le=500),
         offset: int = Query(0, ge=0),
+        cursor: int | None = Query(None, ge=0),
         db: AsyncSession = Depends(get_db),
         current_user: User = Depends(auth_service.get_current_user)):
     """
-    Retrieves a paginated list of contacts for the current user.
+    Retrieves a paginated list of contacts for the current user, ordered by ID.
 
     :param limit: The maximum number of contacts to return.
     :type limit: int
     :param offset: The number of contacts to skip before starting to collect results.
     :type offset: int
+    :param cursor: The ID of the last contact of the previous page; when given, ``offset`` is ignored.
+    :type cursor: int | None
     :param db: The database session.
     :type db: AsyncSession
     :param current_user: The current authenticated user.
@@ -40,15 +45,12 @@ async def get_contacts(
     :raises HTTPException: If an error occurs while retrieving the contacts.
     """
     repo = ContactRepository(db)
-    contacts = await repo.get_contacts(limit, offset, current_user.id)
-    for contact in contacts:
-        contact.birthday = contact.birthday.strftime("%Y-%m-%d")
+    contacts = await repo.get_contacts_projection(limit, offset, current_user.id, cursor)
     return contacts
 
 
 @router.get("/{contact_id}", response_model=ContactResponse,
-            dependencies=[Depends(RoleChecker([RoleEnum.USER, RoleEnum.ADMIN, RoleEnum.MODERATOR])),
-                          Depends(RateLimiter(times=5, seconds=60))])
+            dependencies=CONTACT_DEPENDENCIES)
 async def get_contact(contact_id: int, db: AsyncSession = Depends(get_db),
                       current_user: User = Depends(auth_service.get_current_user)):
     """
@@ -68,13 +70,11 @@ async def get_contact(contact_id: int, db: AsyncSession = Depends(get_db),
     contact = await repo.get_contact(contact_id, current_user.id)
     if contact is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found")
-    contact.birthday = contact.birthday.strftime("%Y-%m-%d") if contact.birthday else None
     return contact
 
 
 @router.post("/", response_model=ContactResponse, status_code=status.HTTP_201_CREATED,
-             dependencies=[Depends(RoleChecker([RoleEnum.USER, RoleEnum.ADMIN, RoleEnum.MODERATOR])),
-                           Depends(RateLimiter(times=5, seconds=60))])
+             dependencies=CONTACT_DEPENDENCIES)
 async def create_contact(body: ContactCreate, db: AsyncSession = Depends(get_db),
                          current_user: User = Depends(auth_service.get_current_user)):
     """
@@ -92,13 +92,11 @@ async def create_contact(body: ContactCreate, db: AsyncSession = Depends(get_db)
     """
     repo = ContactRepository(db)
     contact = await repo.create_contact(body, current_user.id)
-    contact.birthday = contact.birthday.strftime("%Y-%m-%d") if contact.birthday else None
     return contact
 
 
 @router.put("/{contact_id}", response_model=ContactResponse,
-            dependencies=[Depends(RoleChecker([RoleEnum.USER, RoleEnum.ADMIN, RoleEnum.MODERATOR])),
-                          Depends(RateLimiter(times=5, seconds=60))])
+            dependencies=CONTACT_DEPENDENCIES)
 async def update_contact(contact_id: int, body: ContactUpdateSchema, db: AsyncSession = Depends(get_db),
                          current_user: User = Depends(auth_service.get_current_user)):
     """
@@ -120,13 +118,11 @@ async def update_contact(contact_id: int, body: ContactUpdateSchema, db: AsyncSe
     contact = await repo.update_contact(contact_id, body, current_user.id)
     if contact is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found")
-    contact.birthday = contact.birthday.strftime("%Y-%m-%d") if contact.birthday else None
     return contact
 
 
 @router.delete("/{contact_id}", status_code=status.HTTP_204_NO_CONTENT,
-               dependencies=[Depends(RoleChecker([RoleEnum.USER, RoleEnum.ADMIN, RoleEnum.MODERATOR])),
-                             Depends(RateLimiter(times=5, seconds=60))])
+               dependencies=CONTACT_DEPENDENCIES)
 async def delete_contact(contact_id: int, db: AsyncSession = Depends(get_db),
                          current_user: User = Depends(auth_service.get_current_user)):
     """
@@ -143,15 +139,14 @@ async def delete_contact(contact_id: int, db: AsyncSession = Depends(get_db),
     :raises HTTPException: If the contact is not found.
     """
     repo = ContactRepository(db)
-    contact = await repo.delete_contact(contact_id, current_user.id)
-    if contact is None:
+    deleted_id = await repo.delete_contact(contact_id, current_user.id)
+    if deleted_id is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found")
     return None
 
 
 @router.get("/birthdays/", response_model=list[ContactResponse],
-            dependencies=[Depends(RoleChecker([RoleEnum.USER, RoleEnum.ADMIN, RoleEnum.MODERATOR])),
-                          Depends(RateLimiter(times=5, seconds=60))])
+            dependencies=CONTACT_DEPENDENCIES)
 async def get_birthdays(limit: int = Query(10, ge=1, le=500), offset: int = Query(0, ge=0),
                         db: AsyncSession = Depends(get_db),
                         current_user: User = Depends(auth_service.get_current_user)):
@@ -171,23 +166,22 @@ async def get_birthdays(limit: int = Query(10, ge=1, le=500), offset: int = Quer
     :raises HTTPException: If an error occurs while retrieving the contacts.
     """
     repo = ContactRepository(db)
-    contacts = await repo.get_birthdays(limit, offset, current_user.id)
-    for contact in contacts:
-        if isinstance(contact.birthday, (datetime, date)):
-            contact.birthday = contact.birthday.strftime("%Y-%m-%d")
+    contacts = await repo.get_birthdays_projection(limit, offset, current_user.id)
     return contacts
 
 
 @router.get("/search/", response_model=list[ContactResponse],
-            dependencies=[Depends(RoleChecker([RoleEnum.USER, RoleEnum.ADMIN, RoleEnum.MODERATOR])),
-                          Depends(RateLimiter(times=5, seconds=60))])
-async def search_contacts(query: str = Query(None), db: AsyncSession = Depends(get_db),
+            dependencies=CONTACT_DEPENDENCIES)
+async def search_contacts(query: str = Query(..., min_length=1), limit: int = Query(SEARCH_LIMIT, ge=1, le=500),
+                          db: AsyncSession = Depends(get_db),
                           current_user: User = Depends(auth_service.get_current_user)):
     """
     Searches for contacts based on a query string for the current user.
 
     :param query: The query string to search for.
     :type query: str
+    :param limit: The maximum number of contacts to return.
+    :type limit: int
     :param db: The database session.
     :type db: AsyncSession
     :param current_user: The current authenticated user.
@@ -197,7 +191,7 @@ async def search_contacts(query: str = Query(None), db: AsyncSession = Depends(g
     :raises HTTPException: If no contacts are found matching the query.
     """
     repo = ContactRepository(db)
-    contacts = await repo.search_contacts(query, current_user.id)
+    contacts = await repo.search_contacts(query, current_user.id, limit)
     if not contacts:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found")
     return contacts
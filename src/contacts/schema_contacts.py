@@ -1,22 +1,18 @@
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, ConfigDict, Field, EmailStr
 from typing import Optional, List
-from datetime import date, datetime
-
-from pydantic.v1 import validator
+from datetime import date
 
 
 class EmailSchema(BaseModel):
     email: EmailStr
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class PhoneSchema(BaseModel):
     phone: str
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class ContactSchema(BaseModel):
@@ -27,15 +23,6 @@ class ContactSchema(BaseModel):
     emails: Optional[List[EmailSchema]] = None
     phones: Optional[List[PhoneSchema]] = None
 
-    @validator('birthday', pre=True)
-    def parse_date(cls, v):
-        if isinstance(v, date):
-            return v
-        try:
-            return datetime.strptime(v, '%Y-%m-%d').date()
-        except ValueError:
-            raise ValueError('Invalid date format. Date must be in YYYY-MM-DD format.')
-
 
 class ContactUpdateSchema(ContactSchema):
     id: int
@@ -50,8 +37,7 @@ class ContactResponse(BaseModel):
     emails: Optional[List[EmailSchema]] = None
     phones: Optional[List[PhoneSchema]] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class ContactCreate(ContactSchema):
@@ -1,6 +1,7 @@
 import contextlib
 from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
 from src.conf.config import config
 
@@ -9,9 +10,22 @@ from sqlalchemy.ext.declarative import declarative_base
 Base = declarative_base()
 
 
+def engine_options() -> dict:
+    if config.DB_USE_NULL_POOL:
+        # An external pooler (PgBouncer) owns the connections.
+        return {"poolclass": NullPool}
+    return {
+        "pool_size": config.DB_POOL_SIZE,
+        "max_overflow": config.DB_MAX_OVERFLOW,
+        "pool_timeout": config.DB_POOL_TIMEOUT,
+        "pool_pre_ping": True,
+        "pool_recycle": config.DB_POOL_RECYCLE,
+    }
+
+
 class DatabaseSessionManager:
     def __init__(self, url: str):
-        self._engine: AsyncEngine | None = create_async_engine(url)
+        self._engine: AsyncEngine | None = create_async_engine(url, **engine_options())
         self._session_maker = sessionmaker(bind=self._engine, expire_on_commit=False, class_=AsyncSession)
 
     @contextlib.asynccontextmanager
@@ -0,0 +1,187 @@
+import hashlib
+import logging
+
+import orjson
+import redis.asyncio as redis
+from jwt import PyJWTError
+from redis.exceptions import RedisError
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.auth.auth import auth_service
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "http-cache:"
+GENERATION_PREFIX = f"{KEY_PREFIX}gen:"
+WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+
+# Reads the generation of a group of entries and the entry of that generation in one round-trip.
+# Reading also extends the generation's lifetime, so it outlives every entry written under it.
+LOOKUP_SCRIPT = """
+local generation = redis.call('GET', KEYS[1])
+if generation then
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+else
+    generation = '0'
+end
+return {generation, redis.call('GET', ARGV[1] .. generation)}
+"""
+
+
+class ResponseCacheMiddleware:
+    """
+    Caches successful GET responses of selected paths in Redis for a short time.
+
+    Entries are keyed by a digest of the user the bearer access token was issued to, the path
+    and the query string, so a cached response is only replayed to the user it was produced for,
+    whichever of their tokens they present. Requests without a valid access token are not cached.
+    A request to one of ``invalidated_by`` drops the cached entries of the listed paths.
+
+    GET responses under one of ``private_prefixes`` are cached too, and any write under such a
+    prefix drops the entries of that prefix cached for the same user only.
+
+    Entries are dropped without scanning Redis: each key ends with a generation counter, kept per path
+    for ``paths`` and per user and prefix for ``private_prefixes``, and a write increments the
+    counter so the old entries are no longer looked up and expire on their own.
+
+    A cache hit is replayed before the route runs, so its dependencies, including rate limiters,
+    are skipped: repeated identical GETs within ``ttl`` are answered from the cache and never get a 429.
+
+    :param app: The ASGI application to wrap.
+    :type app: ASGIApp
+    :param cache: The Redis client used to store responses.
+    :type cache: redis.Redis
+    :param paths: The paths whose GET responses are cached.
+    :type paths: set[str]
+    :param ttl: The lifetime of a cached response in seconds.
+    :type ttl: int
+    :param invalidated_by: Maps ``(method, path)`` of a write endpoint to the cached paths it changes.
+    :type invalidated_by: dict[tuple[str, str], set[str]] | None
+    :param private_prefixes: Path prefixes of per-user resources whose GET responses are cached.
+    :type private_prefixes: tuple[str, ...]
+    """
+
+    def __init__(self, app: ASGIApp, cache: redis.Redis, paths: set[str], ttl: int = 20,
+                 invalidated_by: dict[tuple[str, str], set[str]] | None = None,
+                 private_prefixes: tuple[str, ...] = ()):
+        self.app = app
+        self.cache = cache
+        self.paths = frozenset(paths)
+        self.ttl = ttl
+        self.invalidated_by = invalidated_by or {}
+        self.private_prefixes = private_prefixes
+        self.lookup = cache.register_script(LOOKUP_SCRIPT)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        method = scope["method"]
+        if method == "GET" and (path in self.paths or path.startswith(self.private_prefixes)):
+            digest = self._user_digest(scope)
+            if digest is not None:
+                await self._cached(scope, receive, send, digest)
+                return
+
+        await self.app(scope, receive, send)
+
+        stale = [self._generation_key(stale_path) for stale_path in self.invalidated_by.get((method, path), ())]
+        if method in WRITE_METHODS and path.startswith(self.private_prefixes):
+            digest = self._user_digest(scope)
+            if digest is not None:
+                stale += [
+                    self._generation_key(prefix, digest) for prefix in self.private_prefixes if path.startswith(prefix)
+                ]
+        if stale:
+            await self._invalidate(stale)
+
+    @staticmethod
+    def _user_digest(scope: Scope) -> str | None:
+        """
+        Identifies the user of a request by the subject of its bearer access token.
+
+        Decoding reuses the per-process token cache of :data:`auth_service`, so it is usually a dict lookup.
+
+        :param scope: The ASGI scope of the request.
+        :type scope: Scope
+        :return: A digest of the token subject, or None if the request carries no valid access token.
+        :rtype: str | None
+        """
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                if scheme.lower() != "bearer" or not token:
+                    return None
+                try:
+                    payload = auth_service.decode_token(token)
+                except PyJWTError:
+                    return None
+                if payload.get("scope") != "access_token":
+                    return None
+                return hashlib.blake2b(payload["sub"].encode("utf-8"), digest_size=16).hexdigest()
+        return None
+
+    @staticmethod
+    def _generation_key(group: str, digest: str | None = None) -> str:
+        if digest is None:
+            return f"{GENERATION_PREFIX}{group}"
+        return f"{GENERATION_PREFIX}{digest}:{group}"
+
+    async def _cached(self, scope: Scope, receive: Receive, send: Send, digest: str) -> None:
+        path = scope["path"]
+        if path in self.paths:
+            generation_key = self._generation_key(path)
+        else:
+            prefix = next(prefix for prefix in self.private_prefixes if path.startswith(prefix))
+            generation_key = self._generation_key(prefix, digest)
+        base_key = f"{KEY_PREFIX}{digest}:{path}?{scope['query_string'].decode('latin-1')}:"
+        try:
+            generation, cached = await self.lookup(keys=[generation_key], args=[base_key, self.ttl * 2])
+        except RedisError as err:
+            logger.warning(f"Response cache unavailable: {err}")
+            await self.app(scope, receive, send)
+            return
+
+        if cached is not None:
+            meta, body = cached.split(b"\n", 1)
+            meta = orjson.loads(meta)
+            headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in meta["headers"]]
+            await send({"type": "http.response.start", "status": meta["status"], "headers": headers})
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        start: Message | None = None
+        chunks: list[bytes] = []
+
+        async def send_and_record(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        await self.app(scope, receive, send_and_record)
+
+        if start is None or start["status"] != 200:
+            return
+        meta = orjson.dumps({
+            "status": start["status"],
+            "headers": [(name.decode("latin-1"), value.decode("latin-1")) for name, value in start["headers"]],
+        })
+        try:
+            await self.cache.set(base_key + generation.decode(), meta + b"\n" + b"".join(chunks), ex=self.ttl)
+        except RedisError as err:
+            logger.warning(f"Response cache unavailable: {err}")
+
+    async def _invalidate(self, generation_keys: list[str]) -> None:
+        try:
+            async with self.cache.pipeline(transaction=False) as pipe:
+                for generation_key in generation_keys:
+                    pipe.incr(generation_key)
+                    pipe.expire(generation_key, self.ttl * 2)
+                await pipe.execute()
+        except RedisError as err:
+            logger.warning(f"Response cache unavailable: {err}")
@@ -1,11 +1,15 @@
 import asyncio
+import os
 
 import pytest
 import pytest_asyncio
+from argon2 import PasswordHasher
+from httpx import ASGITransport, AsyncClient
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
 
 from src.auth.models import Role, User
+from src.auth import password_utils
 from src.auth.password_utils import get_password_hash
 from src.auth.schema_auth import RoleEnum
 from src.conf.config import config
@@ -14,14 +18,20 @@ from src.contacts.models import Contact
 from src.database.db import get_db, Base
 from src.auth.auth import auth_service
 
-engine = create_async_engine(config.DB_TEST_URL, echo=True, future=True)
+# Cheap hashes for fixture users; production keeps the configured cost.
+password_utils.password_hasher = PasswordHasher(time_cost=1, memory_cost=8, parallelism=1)
 
+# Statement logging formats and prints every query; enable it with SQL_ECHO=1 when debugging.
+engine = create_async_engine(config.DB_TEST_URL, echo=bool(os.environ.get("SQL_ECHO")), future=True)
+
+# Sessions are bound per test to the connection of the ``connection`` fixture; their commits
+# only release savepoints inside that connection's transaction.
 SessionLocal = async_sessionmaker(
-    bind=engine,
     class_=AsyncSession,
     autocommit=False,
     expire_on_commit=False,
     autoflush=False,
+    join_transaction_mode="create_savepoint",
 )
 
 test_user_data = {"username": "testuser", "email": "testuser@example.com", "password": "123456"}
@@ -35,8 +45,9 @@ def event_loop():
     loop.close()
 
 
-@pytest.fixture(scope="function", autouse=True)
+@pytest.fixture(scope="session", autouse=True)
 async def setup_db():
+    """Create the schema once for the whole run; tests undo their own writes through ``connection``."""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
         await conn.run_sync(Base.metadata.create_all)
@@ -46,17 +57,28 @@ async def setup_db():
 
 
 @pytest.fixture(scope="function")
-async def db_session():
-    async with SessionLocal() as session:
+async def connection():
+    """A connection whose transaction is rolled back after the test, discarding everything it wrote."""
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        try:
+            yield conn
+        finally:
+            await transaction.rollback()
+
+
+@pytest.fixture(scope="function")
+async def db_session(connection):
+    async with SessionLocal(bind=connection) as session:
         try:
             yield session
         finally:
             await session.close()
 
 @pytest.fixture(scope="function")
-def override_get_db():
+def override_get_db(connection):
     async def _get_db():
-        async with SessionLocal() as session:
+        async with SessionLocal(bind=connection) as session:
             yield session
 
     app.dependency_overrides[get_db] = _get_db
@@ -65,6 +87,14 @@ def override_get_db():
     app.dependency_overrides.clear()
 
 
+@pytest.fixture(scope="session")
+async def client():
+    """One client for the whole run, with the application's lifespan started and stopped once."""
+    async with app.router.lifespan_context(app):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            yield ac
+
+
 @pytest.fixture(scope="function")
 async def user_password(faker):
     return await faker.password()
@@ -6,7 +6,8 @@ from datetime import datetime, timedelta
 from src.contacts.models import Contact, Email, Phone
 from src.contacts.schema_contacts import ContactUpdateSchema, ContactCreate
 from src.contacts.repo_contacts import ContactRepository
-from tests.confi_test import override_get_db, test_user, auth_headers, db_session, test_user_contact, user_password, user_role
+from tests.confi_test import (event_loop, setup_db, connection, override_get_db, test_user, auth_headers, db_session,
+                               test_user_contact, user_password, user_role)
 
 
 
@@ -71,12 +72,14 @@ async def test_update_contact(contact_repository, db_session, test_user, test_us
 
 async def test_delete_contact(contact_repository, db_session, test_user, test_user_contact, override_get_db):
 
-    deleted_contact = await contact_repository.delete_contact(contact_id=test_user_contact.id, owner_id=test_user.id)
-    assert deleted_contact.id == test_user_contact.id
+    deleted_id = await contact_repository.delete_contact(contact_id=test_user_contact.id, owner_id=test_user.id)
+    assert deleted_id == test_user_contact.id
 
-
-    with pytest.raises(HTTPException):
+    with pytest.raises(HTTPException) as exc_info:
         await contact_repository.get_contact(contact_id=test_user_contact.id, owner_id=test_user.id)
+    assert exc_info.value.status_code == 404
+
+    assert await contact_repository.delete_contact(contact_id=test_user_contact.id, owner_id=test_user.id) is None
 
 
 
@@ -0,0 +1,151 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import jwt
+import pytest
+from fastapi import HTTPException
+from redis.exceptions import ConnectionError
+
+from src.auth import auth, route_auth
+from src.auth.auth import JWT_ALGORITHM, JWT_SECRET_KEY, REFRESH_TOKEN_KEY_PREFIX, auth_service
+
+SUB = "юзер@example.com"
+
+
+def test_access_token_matches_pyjwt():
+    token = auth_service.create_access_token({"sub": SUB})
+
+    payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+    assert token == jwt.encode(payload, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
+    assert payload["sub"] == SUB
+    assert payload["scope"] == "access_token"
+
+
+def test_access_token_round_trips_through_decode_token():
+    token = auth_service.create_access_token({"sub": SUB})
+
+    assert auth_service.decode_token(token) == jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+
+
+def test_refresh_token_round_trips():
+    token = auth_service.create_refresh_token({"sub": SUB})
+
+    assert auth_service.decode_refresh_token(token).username == SUB
+
+
+def test_refresh_token_rejects_access_scope():
+    token = auth_service.create_access_token({"sub": SUB})
+
+    with pytest.raises(HTTPException) as exc_info:
+        auth_service.decode_refresh_token(token)
+    assert exc_info.value.status_code == 401
+
+
+def test_email_token_round_trips():
+    token = auth_service.create_email_token({"sub": SUB})
+
+    assert auth_service.get_email_from_token(token) == SUB
+
+
+def test_tampered_token_is_rejected():
+    token = auth_service.create_email_token({"sub": SUB})
+    header, payload, signature = token.split(".")
+    forged = jwt.encode({"sub": "other@example.com"}, "wrong-key", algorithm=JWT_ALGORITHM).split(".")[1]
+
+    with pytest.raises(HTTPException):
+        auth_service.get_email_from_token(f"{header}.{forged}.{signature}")
+
+
+class FakeRedis:
+    """
+    An in-memory stand-in for the Redis commands the refresh token store uses, ignoring expiry.
+    """
+
+    def __init__(self):
+        self.store: dict[str, bytes] = {}
+
+    async def set(self, key, value, ex=None):
+        self.store[key] = value.encode()
+
+    async def getdel(self, key):
+        return self.store.pop(key, None)
+
+
+class DownRedis:
+    async def set(self, key, value, ex=None):
+        raise ConnectionError("Redis is down")
+
+    async def getdel(self, key):
+        raise ConnectionError("Redis is down")
+
+
+@pytest.fixture
+def users(monkeypatch):
+    repo = SimpleNamespace(get_user_by_email=AsyncMock(return_value=SimpleNamespace(email=SUB)))
+    monkeypatch.setattr(auth, "UserRepository", lambda db: repo)
+    return repo
+
+
+async def test_refresh_token_is_redeemed_once(monkeypatch, users):
+    cache = FakeRedis()
+    monkeypatch.setattr(auth_service, "cache", cache)
+    token = await auth_service.issue_refresh_token(SUB)
+
+    assert list(cache.store) == [f"{REFRESH_TOKEN_KEY_PREFIX}{auth_service.decode_token(token)['jti']}"]
+    assert await auth_service.redeem_refresh_token(token, db=None) == SUB
+    with pytest.raises(HTTPException) as exc_info:
+        await auth_service.redeem_refresh_token(token, db=None)
+
+    assert exc_info.value.status_code == 401
+    users.get_user_by_email.assert_not_awaited()
+
+
+async def test_refresh_token_is_rejected_while_redis_is_down(monkeypatch, users):
+    monkeypatch.setattr(auth_service, "cache", FakeRedis())
+    token = await auth_service.issue_refresh_token(SUB)
+    monkeypatch.setattr(auth_service, "cache", DownRedis())
+
+    with pytest.raises(HTTPException) as exc_info:
+        await auth_service.redeem_refresh_token(token, db=None)
+
+    assert exc_info.value.status_code == 503
+    users.get_user_by_email.assert_not_awaited()
+
+
+async def test_refresh_token_is_not_issued_while_redis_is_down(monkeypatch):
+    monkeypatch.setattr(auth_service, "cache", DownRedis())
+
+    with pytest.raises(HTTPException) as exc_info:
+        await auth_service.issue_refresh_token(SUB)
+
+    assert exc_info.value.status_code == 503
+
+
+async def test_refresh_token_without_id_is_checked_against_the_database(monkeypatch, users):
+    monkeypatch.setattr(auth_service, "cache", DownRedis())
+    expire = datetime.now(timezone.utc) + timedelta(days=1)
+    token = jwt.encode({"sub": SUB, "exp": expire, "scope": "refresh_token"}, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
+
+    assert await auth_service.redeem_refresh_token(token, db=None) == SUB
+
+    users.get_user_by_email.assert_awaited_once_with(SUB)
+
+
+@pytest.mark.parametrize("user, password_ok, cache, status_code", [
+    (None, False, FakeRedis(), 401),
+    (SimpleNamespace(email=SUB, hashed_password="hash"), False, FakeRedis(), 401),
+    (SimpleNamespace(email=SUB, hashed_password="hash"), True, DownRedis(), 503),
+])
+async def test_login_keeps_http_error_status(monkeypatch, user, password_ok, cache, status_code):
+    repo = SimpleNamespace(get_user=AsyncMock(return_value=user))
+    monkeypatch.setattr(route_auth, "UserRepository", lambda db: repo)
+    monkeypatch.setattr(auth_service, "verify_password", AsyncMock(return_value=password_ok))
+    monkeypatch.setattr(route_auth, "password_needs_rehash", lambda hashed_password: False)
+    monkeypatch.setattr(auth_service, "cache", cache)
+    form_data = SimpleNamespace(username=SUB, password="secret")
+
+    with pytest.raises(HTTPException) as exc_info:
+        await route_auth.login_for_access_token(form_data, db=None)
+
+    assert exc_info.value.status_code == status_code
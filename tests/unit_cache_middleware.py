@@ -0,0 +1,167 @@
+from datetime import timedelta
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from src.auth.auth import auth_service
+from src.middleware.cache import ResponseCacheMiddleware
+
+pytestmark = pytest.mark.asyncio(scope="module")
+
+
+def bearer(email: str, expires_minutes: int = 30) -> dict[str, str]:
+    token = auth_service.create_access_token({"sub": email}, expires_delta=timedelta(minutes=expires_minutes))
+    return {"Authorization": f"Bearer {token}"}
+
+
+ALICE = bearer("alice@example.com")
+# A second valid token of the same user, as issued after /auth/refresh or a later login.
+ALICE_REFRESHED = bearer("alice@example.com", expires_minutes=60)
+BOB = bearer("bob@example.com")
+
+
+class FakePipeline:
+    def __init__(self, cache: "FakeRedis"):
+        self.cache = cache
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def incr(self, key):
+        self.commands.append(("incr", key))
+
+    def expire(self, key, seconds):
+        self.commands.append(("expire", key))
+
+    async def execute(self):
+        for command, key in self.commands:
+            if command == "incr":
+                self.cache.store[key] = str(int(self.cache.store.get(key, b"0")) + 1).encode()
+        return []
+
+
+class FakeRedis:
+    """
+    An in-memory stand-in for the Redis commands the middleware uses, ignoring expiry.
+    """
+
+    def __init__(self):
+        self.store: dict[str, bytes] = {}
+
+    def register_script(self, script):
+        async def lookup(keys, args):
+            generation = self.store.get(keys[0], b"0")
+            return [generation, self.store.get(args[0] + generation.decode())]
+
+        return lookup
+
+    async def set(self, key, value, ex=None):
+        self.store[key] = value
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+@pytest.fixture
+def calls():
+    return {"count": 0}
+
+
+@pytest.fixture
+def client(calls):
+    app = FastAPI()
+
+    @app.get("/api/get_all_roles")
+    async def get_all_roles():
+        calls["count"] += 1
+        return {"count": calls["count"]}
+
+    @app.post("/api/create_role")
+    async def create_role():
+        return {}
+
+    @app.get("/contacts/")
+    async def get_contacts():
+        calls["count"] += 1
+        return {"count": calls["count"]}
+
+    @app.post("/contacts/")
+    async def create_contact():
+        return {}
+
+    cached_app = ResponseCacheMiddleware(
+        app, cache=FakeRedis(), paths={"/api/get_all_roles"},
+        invalidated_by={("POST", "/api/create_role"): {"/api/get_all_roles"}},
+        private_prefixes=("/contacts/",),
+    )
+    return AsyncClient(transport=ASGITransport(app=cached_app), base_url="http://test")
+
+
+async def test_repeated_get_is_served_from_cache(client, calls):
+    first = await client.get("/contacts/", headers=ALICE)
+    second = await client.get("/contacts/", headers=ALICE)
+
+    assert first.json() == second.json() == {"count": 1}
+    assert second.headers["content-type"] == first.headers["content-type"]
+    assert calls["count"] == 1
+
+
+async def test_query_string_is_part_of_the_key(client, calls):
+    await client.get("/contacts/?limit=1", headers=ALICE)
+    await client.get("/contacts/?limit=2", headers=ALICE)
+
+    assert calls["count"] == 2
+
+
+async def test_entries_are_isolated_by_credentials(client, calls):
+    await client.get("/contacts/", headers=ALICE)
+    response = await client.get("/contacts/", headers=BOB)
+
+    assert response.json() == {"count": 2}
+
+
+async def test_write_drops_only_the_writers_private_entries(client, calls):
+    await client.get("/contacts/", headers=ALICE)
+    await client.get("/contacts/", headers=BOB)
+
+    await client.post("/contacts/", headers=ALICE)
+
+    assert (await client.get("/contacts/", headers=ALICE)).json() == {"count": 3}
+    assert (await client.get("/contacts/", headers=BOB)).json() == {"count": 2}
+
+
+async def test_listed_write_drops_shared_path_entries(client, calls):
+    await client.get("/api/get_all_roles", headers=ALICE)
+    assert (await client.get("/api/get_all_roles", headers=ALICE)).json() == {"count": 1}
+
+    await client.post("/api/create_role", headers=BOB)
+
+    assert (await client.get("/api/get_all_roles", headers=ALICE)).json() == {"count": 2}
+
+
+async def test_entries_are_shared_by_the_tokens_of_one_user(client, calls):
+    await client.get("/contacts/", headers=ALICE)
+    response = await client.get("/contacts/", headers=ALICE_REFRESHED)
+
+    assert response.json() == {"count": 1}
+
+
+async def test_write_with_one_token_drops_entries_of_the_users_other_tokens(client, calls):
+    await client.get("/contacts/", headers=ALICE)
+
+    await client.post("/contacts/", headers=ALICE_REFRESHED)
+
+    assert (await client.get("/contacts/", headers=ALICE)).json() == {"count": 2}
+
+
+@pytest.mark.parametrize("headers", [{}, {"Authorization": "Bearer not-a-token"}])
+async def test_requests_without_a_valid_access_token_are_not_cached(client, calls, headers):
+    await client.get("/contacts/", headers=headers)
+    response = await client.get("/contacts/", headers=headers)
+
+    assert response.json() == {"count": 2}
@@ -0,0 +1,110 @@
+import os
+from unittest.mock import AsyncMock
+
+import pytest
+from fastapi_mail.errors import ConnectionErrors
+
+from src.admin import email_worker
+from src.admin.email_worker import (DEAD_LETTER_QUEUE, EMAIL_QUEUE, EMAIL_QUEUE_GROUP, MAX_DELIVERIES,
+                                    consumer_name, deliver, process, reclaim)
+
+pytestmark = pytest.mark.asyncio(scope="module")
+
+CONSUMER = "host-1"
+FIELDS = {b"email": b"user@example.com", b"username": b"user", b"host": b"http://test/"}
+
+
+class FakeStreamCache:
+    """
+    A stand-in for the Redis client with only the stream commands the worker calls.
+    """
+
+    def __init__(self):
+        self.xreadgroup = AsyncMock(return_value=[])
+        self.xautoclaim = AsyncMock(return_value=[b"0-0", [], []])
+        self.xpending_range = AsyncMock(return_value=[])
+        self.xack = AsyncMock(return_value=1)
+        self.xadd = AsyncMock()
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    fake = FakeStreamCache()
+    monkeypatch.setattr(email_worker.auth_service, "cache", fake)
+    return fake
+
+
+@pytest.fixture
+def sender(monkeypatch):
+    fake = AsyncMock()
+    monkeypatch.setattr(email_worker, "send_email", fake)
+    return fake
+
+
+def test_consumer_name_is_unique_per_process():
+    assert consumer_name().endswith(f"-{os.getpid()}")
+
+
+async def test_deliver_acks_sent_email(cache, sender):
+    assert await deliver(b"1-0", FIELDS) is True
+
+    sender.assert_awaited_once_with("user@example.com", "user", "http://test/")
+    cache.xack.assert_awaited_once_with(EMAIL_QUEUE, EMAIL_QUEUE_GROUP, b"1-0")
+
+
+async def test_deliver_keeps_failed_email_pending(cache, sender):
+    sender.side_effect = ConnectionErrors("SMTP is down")
+
+    assert await deliver(b"1-0", FIELDS) is False
+
+    cache.xack.assert_not_awaited()
+
+
+async def test_process_delivers_new_messages(cache, sender):
+    cache.xreadgroup.return_value = [[EMAIL_QUEUE.encode(), [(b"1-0", FIELDS), (b"2-0", FIELDS)]]]
+
+    assert await process(CONSUMER) is True
+
+    assert cache.xreadgroup.await_args.args[2] == {EMAIL_QUEUE: ">"}
+    assert sender.await_count == 2
+    assert cache.xack.await_count == 2
+
+
+async def test_reclaim_retries_pending_messages(cache, sender):
+    cache.xautoclaim.return_value = [b"0-0", [(b"1-0", FIELDS)], []]
+    cache.xpending_range.return_value = [{"message_id": b"1-0", "times_delivered": 2}]
+
+    assert await reclaim(CONSUMER) == 1
+
+    assert cache.xautoclaim.await_args.args[:3] == (EMAIL_QUEUE, EMAIL_QUEUE_GROUP, CONSUMER)
+    sender.assert_awaited_once()
+    cache.xack.assert_awaited_once_with(EMAIL_QUEUE, EMAIL_QUEUE_GROUP, b"1-0")
+    cache.xadd.assert_not_awaited()
+
+
+async def test_reclaim_dead_letters_after_max_deliveries(cache, sender):
+    cache.xautoclaim.return_value = [b"0-0", [(b"1-0", FIELDS)], []]
+    cache.xpending_range.return_value = [{"message_id": b"1-0", "times_delivered": MAX_DELIVERIES + 1}]
+
+    assert await reclaim(CONSUMER) == 1
+
+    sender.assert_not_awaited()
+    assert cache.xadd.await_args.args == (DEAD_LETTER_QUEUE, FIELDS)
+    cache.xack.assert_awaited_once_with(EMAIL_QUEUE, EMAIL_QUEUE_GROUP, b"1-0")
+
+
+async def test_reclaim_acks_trimmed_messages(cache, sender):
+    cache.xautoclaim.return_value = [b"0-0", [(b"1-0", None)], []]
+    cache.xpending_range.return_value = [{"message_id": b"1-0", "times_delivered": 2}]
+
+    assert await reclaim(CONSUMER) == 1
+
+    sender.assert_not_awaited()
+    cache.xack.assert_awaited_once_with(EMAIL_QUEUE, EMAIL_QUEUE_GROUP, b"1-0")
+
+
+async def test_reclaim_without_idle_messages(cache, sender):
+    assert await reclaim(CONSUMER) == 0
+
+    cache.xpending_range.assert_not_awaited()
+    sender.assert_not_awaited()
@@ -0,0 +1,70 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi_mail import MessageSchema, MessageType
+from fastapi_mail.errors import ConnectionErrors, PydanticClassRequired
+
+from src.admin import emails
+from src.admin.emails import PooledFastMail, conf
+
+pytestmark = pytest.mark.asyncio(scope="module")
+
+
+def make_message() -> MessageSchema:
+    return MessageSchema(
+        subject="Confirm your email",
+        recipients=["user@example.com"],
+        template_body={"host": "http://test/", "username": "test_user", "token": "token"},
+        subtype=MessageType.html,
+    )
+
+
+@pytest.fixture
+def smtp():
+    session = MagicMock(is_connected=True)
+    session.send_message = AsyncMock()
+    return session
+
+
+@pytest.fixture
+def mailer(smtp):
+    mail = PooledFastMail(conf, max_messages=2)
+
+    async def connect():
+        mail._smtp = smtp
+        mail._sent = 0
+
+    mail.connect = AsyncMock(side_effect=connect)
+    mail.close = AsyncMock()
+    return mail
+
+
+async def test_send_message_renders_template(mailer, smtp):
+    await mailer.send_message(make_message(), template_name="verify_email.html")
+
+    smtp.send_message.assert_awaited_once()
+    sent = smtp.send_message.await_args.args[0]
+    assert "user@example.com" in sent["To"]
+    html = next(part for part in sent.walk() if part.get_content_type() == "text/html")
+    assert "test_user" in html.get_payload(decode=True).decode()
+
+
+async def test_send_message_reuses_the_session(mailer, smtp):
+    for _ in range(3):
+        await mailer.send_message(make_message(), template_name="verify_email.html")
+
+    assert smtp.send_message.await_count == 3
+    # The third message exceeds max_messages=2, so the session is reopened once.
+    assert mailer.connect.await_count == 2
+
+
+async def test_send_message_requires_message_schema(mailer):
+    with pytest.raises(PydanticClassRequired):
+        await mailer.send_message({"subject": "not a schema"})
+
+
+async def test_send_email_raises_on_connection_error(monkeypatch):
+    monkeypatch.setattr(emails.fm, "send_message", AsyncMock(side_effect=ConnectionErrors("SMTP is down")))
+
+    with pytest.raises(ConnectionErrors):
+        await emails.send_email("user@example.com", "user", "http://test/")
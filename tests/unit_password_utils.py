@@ -0,0 +1,32 @@
+import pytest
+
+from src.auth import password_utils
+from src.auth.password_utils import (HASH_POOL_START_METHOD, get_password_hash_async, shutdown_hash_pool,
+                                     start_hash_pool, verify_password_async)
+
+pytestmark = pytest.mark.asyncio(scope="module")
+
+
+def test_pool_does_not_fork_the_running_process():
+    assert HASH_POOL_START_METHOD in ("forkserver", "spawn")
+
+
+async def test_pool_hashes_and_verifies_in_worker_processes():
+    start_hash_pool(max_workers=1)
+    try:
+        assert password_utils._hash_pool._mp_context.get_start_method() == HASH_POOL_START_METHOD
+
+        hashed = await get_password_hash_async("secret")
+
+        assert await verify_password_async("secret", hashed) is True
+        assert await verify_password_async("wrong", hashed) is False
+    finally:
+        await shutdown_hash_pool()
+
+    assert password_utils._hash_pool is None
+
+
+async def test_shutdown_without_pool_is_a_no_op():
+    await shutdown_hash_pool()
+
+    assert password_utils._hash_pool is None
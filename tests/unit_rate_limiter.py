@@ -0,0 +1,168 @@
+from unittest.mock import AsyncMock
+
+import pytest
+from fastapi import Depends, FastAPI
+from httpx import ASGITransport, AsyncClient
+from redis.exceptions import ConnectionError
+
+from src.auth.rate_limiter import SlidingWindowRateLimiter, TokenBucketRateLimiter
+
+pytestmark = pytest.mark.asyncio(scope="module")
+
+
+class FakeSlidingWindowScript:
+    """
+    Mirrors SLIDING_WINDOW_SCRIPT over an in-memory store shared by every limiter using it.
+    """
+
+    def __init__(self):
+        self.windows: dict[str, list[int]] = {}
+
+    async def __call__(self, keys, args):
+        now, window, limit, _ = args
+        hits = [hit for hit in self.windows.get(keys[0], []) if hit > now - window]
+        if len(hits) >= limit:
+            self.windows[keys[0]] = hits
+            return 0
+        self.windows[keys[0]] = hits + [now]
+        return 1
+
+
+class FakeTokenBucketScript:
+    """
+    Mirrors TOKEN_BUCKET_SCRIPT over an in-memory store shared by every limiter using it.
+    """
+
+    def __init__(self):
+        self.buckets: dict[str, tuple[float, int]] = {}
+        self.keys: list[str] = []
+
+    async def __call__(self, keys, args):
+        capacity, refill_per_ms, now, _ = args
+        self.keys.append(keys[0])
+        tokens, ts = self.buckets.get(keys[0], (capacity, now))
+        tokens = min(capacity, tokens + max(0, now - ts) * float(refill_per_ms))
+        allowed = tokens >= 1
+        self.buckets[keys[0]] = (tokens - allowed, now)
+        return int(allowed)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = {"seconds": 1000.0}
+    monkeypatch.setattr("src.auth.rate_limiter.time.time", lambda: now["seconds"])
+    return now
+
+
+def make_client(limiter) -> AsyncClient:
+    """
+    Builds an app whose routes are all limited by ``limiter``; each client stands in for one worker.
+    """
+    app = FastAPI()
+
+    @app.get("/items/{item_id}", dependencies=[Depends(limiter)])
+    async def read_item(item_id: int):
+        return {}
+
+    @app.post("/items/{item_id}", dependencies=[Depends(limiter)])
+    async def write_item(item_id: int):
+        return {}
+
+    @app.get("/other/{item_id}", dependencies=[Depends(limiter)])
+    async def read_other(item_id: int):
+        return {}
+
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+
+@pytest.fixture
+def window_script(monkeypatch):
+    script = FakeSlidingWindowScript()
+    monkeypatch.setattr(SlidingWindowRateLimiter, "script", script)
+    return script
+
+
+@pytest.fixture
+def bucket_script(monkeypatch):
+    script = FakeTokenBucketScript()
+    monkeypatch.setattr(TokenBucketRateLimiter, "script", script)
+    return script
+
+
+async def test_sliding_window_rejects_over_limit(window_script, clock):
+    client = make_client(SlidingWindowRateLimiter(times=2, seconds=60))
+
+    statuses = [(await client.get("/items/1")).status_code for _ in range(3)]
+
+    assert statuses == [200, 200, 429]
+
+
+async def test_sliding_window_frees_slots_after_window(window_script, clock):
+    client = make_client(SlidingWindowRateLimiter(times=2, seconds=60))
+    for _ in range(2):
+        await client.get("/items/1")
+
+    clock["seconds"] += 61
+
+    assert (await client.get("/items/1")).status_code == 200
+
+
+async def test_sliding_window_lets_requests_through_without_redis(monkeypatch, clock):
+    monkeypatch.setattr(SlidingWindowRateLimiter, "script", AsyncMock(side_effect=ConnectionError("down")))
+    client = make_client(SlidingWindowRateLimiter(times=2, seconds=60))
+
+    assert (await client.get("/items/1")).status_code == 200
+
+
+async def test_token_bucket_rejects_over_limit(bucket_script, clock):
+    client = make_client(TokenBucketRateLimiter(times=2, seconds=60))
+
+    responses = [await client.get(f"/items/{item_id}") for item_id in range(3)]
+
+    assert [response.status_code for response in responses] == [200, 200, 429]
+    assert responses[-1].headers["Retry-After"] == "60"
+
+
+async def test_token_bucket_limit_is_shared_across_workers(bucket_script, clock):
+    first_worker = make_client(TokenBucketRateLimiter(times=2, seconds=60))
+    second_worker = make_client(TokenBucketRateLimiter(times=2, seconds=60))
+
+    statuses = [(await client.get("/items/1")).status_code for client in (first_worker, second_worker) * 2]
+
+    assert statuses == [200, 200, 429, 429]
+
+
+async def test_token_bucket_keys_by_method_and_route_template(bucket_script, clock):
+    client = make_client(TokenBucketRateLimiter(times=2, seconds=60))
+
+    await client.get("/items/1")
+    await client.get("/items/2")
+    await client.post("/items/1")
+    await client.get("/other/1")
+
+    assert bucket_script.keys == [
+        "tb:GET:/items/{item_id}:127.0.0.1",
+        "tb:GET:/items/{item_id}:127.0.0.1",
+        "tb:POST:/items/{item_id}:127.0.0.1",
+        "tb:GET:/other/{item_id}:127.0.0.1",
+    ]
+
+
+async def test_token_bucket_refills_over_time(bucket_script, clock):
+    client = make_client(TokenBucketRateLimiter(times=2, seconds=60))
+    for _ in range(2):
+        await client.get("/items/1")
+    assert (await client.get("/items/1")).status_code == 429
+
+    # Two tokens per minute refill one token every 30 seconds.
+    clock["seconds"] += 30
+
+    assert (await client.get("/items/1")).status_code == 200
+    assert (await client.get("/items/1")).status_code == 429
+
+
+async def test_token_bucket_lets_requests_through_without_redis(monkeypatch, clock):
+    monkeypatch.setattr(TokenBucketRateLimiter, "script", AsyncMock(side_effect=ConnectionError("down")))
+    client = make_client(TokenBucketRateLimiter(times=2, seconds=60))
+
+    assert (await client.get("/items/1")).status_code == 200
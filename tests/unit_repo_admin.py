@@ -0,0 +1,83 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from src.admin.repo_admin import AdminRepository, RoleRepository
+from src.admin.schemas_admin import RoleCreate
+
+pytestmark = pytest.mark.asyncio(scope="module")
+
+
+@pytest.fixture
+def session():
+    session = MagicMock()
+    session.execute = AsyncMock()
+    session.commit = AsyncMock()
+    session.refresh = AsyncMock()
+    return session
+
+
+@pytest.fixture
+def repo(session, monkeypatch):
+    monkeypatch.setattr(RoleRepository, "_known_role_names", set())
+    return RoleRepository(session)
+
+
+def stub_scalar_one_or_none(session, value):
+    session.execute.return_value = SimpleNamespace(scalar_one_or_none=lambda: value)
+
+
+async def test_role_exists_remembers_found_names(repo, session):
+    stub_scalar_one_or_none(session, 1)
+
+    assert await repo.role_exists("moderator") is True
+    assert await repo.role_exists("moderator") is True
+
+    session.execute.assert_awaited_once()
+    assert RoleRepository._known_role_names == {"moderator"}
+
+
+async def test_role_exists_always_queries_unknown_names(repo, session):
+    stub_scalar_one_or_none(session, None)
+
+    assert await repo.role_exists("auditor") is False
+    assert await repo.role_exists("auditor") is False
+
+    assert session.execute.await_count == 2
+    assert RoleRepository._known_role_names == set()
+
+
+async def test_created_role_is_known_without_a_query(repo, session):
+    role = await repo.create_role(RoleCreate(name="auditor"))
+
+    assert await RoleRepository(session).role_exists("auditor") is True
+
+    session.execute.assert_not_awaited()
+    assert RoleRepository._known_role_names == {role.name}
+
+
+def executed_sql(session) -> tuple[str, dict]:
+    compiled = session.execute.await_args.args[0].compile(dialect=postgresql.dialect())
+    return " ".join(compiled.string.split()), compiled.params
+
+
+@pytest.mark.parametrize("cursor, where, params", [
+    (None, "FROM contacts ORDER BY contacts.id LIMIT", {"param_1": 10, "param_2": 20}),
+    (5, "FROM contacts WHERE contacts.id > %(id_1)s ORDER BY contacts.id LIMIT", {"id_1": 5, "param_1": 10}),
+])
+async def test_get_all_contacts_projection(session, cursor, where, params):
+    session.execute.return_value = SimpleNamespace(mappings=lambda: SimpleNamespace(all=lambda: [
+        {"id": 1, "emails": None, "phones": ["2222222222"]},
+    ]))
+
+    result = await AdminRepository(session).get_all_contacts_projection(10, 20, cursor)
+
+    assert result == [{"id": 1, "emails": [], "phones": [{"phone": "2222222222"}]}]
+    sql, compiled_params = executed_sql(session)
+    assert sql.startswith("SELECT contacts.id, contacts.firstname, contacts.lastname, contacts.birthday, "
+                          "contacts.description, (SELECT array_agg(emails.email)")
+    assert where in sql
+    assert "owner_id" not in sql
+    assert compiled_params == params
@@ -1,219 +1,302 @@
-import unittest
-from datetime import datetime, timedelta
-from unittest.mock import MagicMock, AsyncMock
+from datetime import date
+from unittest.mock import MagicMock, AsyncMock, seal
 import logging
+import os
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
 
-from sqlalchemy.ext.asyncio import AsyncSession
 from src.contacts.models import Contact, Email, Phone, User
 from src.contacts.schema_contacts import ContactCreate, ContactUpdateSchema, EmailSchema, PhoneSchema
 from src.contacts.repo_contacts import ContactRepository
 
-logging.basicConfig(level=logging.DEBUG)
+logging.basicConfig(level=logging.DEBUG if os.environ.get("TEST_VERBOSE") else logging.WARNING)
 logger = logging.getLogger(__name__)
 
-
-class TestAsyncContacts(unittest.IsolatedAsyncioTestCase):
-
-    def setUp(self) -> None:
-        self.user = User(id=1, username='test_user', hashed_password="qwerty", is_active=True)
-        self.session = AsyncMock(spec=AsyncSession)
-        self.repo = ContactRepository(self.session)
-        logger.info("Test setup completed.")
-
-    async def test_get_all_contacts(self):
-        logger.info("Starting test_get_all_contacts...")
-
-        limit = 10
-        offset = 0
-        contacts = [
-            Contact(id=1, firstname="Іван", lastname="Петренко", birthday="1990-01-01", description="Тестовий опис 1",
-                    emails=[Email(id=1, email="user1@example.com")],
-                    phones=[Phone(id=1, phone="2222222222")]),
-            Contact(id=2, firstname="Марія", lastname="Шевченко", birthday="1985-02-15", description="Тестовий опис 2",
-                    emails=[Email(id=1, email="user2@example.com")],
-                    phones=[Phone(id=1, phone="3333333333")]
-                    )]
-        mocked_contacts = MagicMock()
-        mocked_contacts.scalars.return_value.all.return_value = contacts
-        self.session.execute.return_value = mocked_contacts
-
-        result = await self.repo.get_all_contacts(limit, offset)
-        logger.debug(f"Retrieved contacts: {result}")
-
-        self.assertEqual(result, contacts)
-        self.session.execute.assert_called_once()
-        mocked_contacts.scalars.return_value.all.assert_called_once()
-        logger.info("test_get_all_contacts completed successfully.")
-
-    async def test_get_contact(self):
-        logger.info("Starting test_get_contact...")
-
-        contact_id = 1
-        owner_id = 1
-        contact = Contact(id=contact_id, firstname="Іван", lastname="Петренко", birthday="1990-01-01",
-                          description="Тестовий опис",
-                          emails=[Email(id=1, email="user1@example.com")],
-                          phones=[Phone(id=1, phone="2222222222")])
-        mocked_contact = MagicMock()
-        mocked_contact.scalar_one_or_none.return_value = contact
-        self.session.execute.return_value = mocked_contact
-
-        result = await self.repo.get_contact(contact_id, owner_id)
-        logger.debug(f"Retrieved contact: {result}")
-
-        self.assertEqual(result.firstname, contact.firstname)
-        self.assertEqual(result.lastname, contact.lastname)
-        self.assertEqual(result.birthday, contact.birthday)
-        self.assertEqual(result.description, contact.description)
-        self.assertEqual([e.email for e in result.emails], [e.email for e in contact.emails])
-        self.assertEqual([p.phone for p in result.phones], [p.phone for p in contact.phones])
-
-        self.session.execute.assert_called_once()
-        mocked_contact.scalar_one_or_none.assert_called_once()
-        logger.info("test_get_contact completed successfully.")
-
-    async def test_create_contact(self):
-        logger.info("Starting test_create_contact...")
-        body = ContactCreate(firstname="Іван", lastname="Петренко", birthday="1990-01-01", description="Тестовий опис",
-                             emails=[EmailSchema(email="user1@example.com")],
-                             phones=[PhoneSchema(phone="2222222222")])
-        # Mocked result for the created contact
-        contact = Contact(id=1, firstname="Іван", lastname="Петренко", birthday="1990-01-01",
-                          description="Тестовий опис",
-                          emails=[Email(id=1, email="user1@example.com")],
-                          phones=[Phone(id=1, phone="2222222222")])
-        self.repo.create_contact = AsyncMock(return_value=contact)
-
-        result = await self.repo.create_contact(body, self.user)
-        logger.debug(f"Contact created: {result}")
-
-        self.assertIsInstance(result, Contact)
-        self.assertEqual(result.firstname, body.firstname)
-        self.assertEqual(result.lastname, body.lastname)
-        self.assertEqual(result.birthday, body.birthday.strftime("%Y-%m-%d"))
-        self.assertEqual(result.description, body.description)
-        self.assertEqual([e.email for e in result.emails], [e.email for e in body.emails])
-        self.assertEqual([p.phone for p in result.phones], [p.phone for p in body.phones])
-        logger.info("test_create_contact completed successfully.")
-
-    async def test_update_contact(self):
-        logger.info("Starting test_update_contact...")
-
-        contact_id = 1
-        owner_id = 1
-        body = ContactUpdateSchema(id=contact_id, firstname="Іван", lastname="Петренко", birthday="1990-01-01",
-                                   description="Тестовий опис",
-                                   emails=[EmailSchema(email="user2@example.com")],
-                                   phones=[PhoneSchema(phone="3333333333")])
-        mocked_contact = MagicMock()
-        mocked_contact.scalar_one_or_none.return_value = Contact(id=contact_id, firstname="Марія", lastname="Шевченко",
-                                                                 birthday="1985-02-15", description="Тестовий опис 2",
-                                                                 emails=[Email(id=1, email="user2@example.com")],
-                                                                 phones=[Phone(id=1, phone="3333333333")])
-        self.session.execute.return_value = mocked_contact
-
-        result = await self.repo.update_contact(contact_id, body, owner_id)
-        logger.debug(f"Contact updated: {result}")
-
-        self.assertIsInstance(result, Contact)
-        self.assertEqual(result.firstname, body.firstname)
-        self.assertEqual(result.lastname, body.lastname)
-        self.assertEqual(result.birthday, body.birthday)
-
-        self.assertEqual(result.description, body.description)
-        self.assertEqual([e.email for e in result.emails], [e.email for e in body.emails])
-        self.assertEqual([p.phone for p in result.phones], [p.phone for p in body.phones])
-        logger.info("test_update_contact completed successfully.")
-
-    async def test_delete_contact(self):
-        logger.info("Starting test_delete_contact...")
-
-        contact_id = 1
-        owner_id = 1
-
-        contact = Contact(
-            id=contact_id,
-            firstname="Іван",
-            lastname="Петренко",
-            birthday="1990-01-01",
-            description="Тестовий опис",
-            emails=[Email(id=1, email="user2@example.com")],
-            phones=[Phone(id=1, phone="3333333333")]
-        )
-
-        self.repo.delete_contact = AsyncMock(return_value=contact)
-
-        result = await self.repo.delete_contact(contact_id, owner_id)
-        logger.debug(f"Contact deleted: {result}")
-
-        self.assertIsInstance(result, Contact)
-
-        logger.info("test_delete_contact completed successfully.")
-
-    async def test_get_birthdays(self):
-        logger.info("Starting test_get_birthdays...")
-
-        limit = 10
-        offset = 0
-        owner_id = 1
-        today = datetime.now().date()
-        future_date = today + timedelta(days=7)
-
-        contacts = [
-            Contact(id=1, firstname="Іван", lastname="Петренко", birthday=today + timedelta(days=3),
-                    description="Тестовий опис 1",
-                    emails=[Email(id=1, email="user1@example.com")],
-                    phones=[Phone(id=1, phone="2222222222")]),
-            Contact(id=2, firstname="Марія", lastname="Шевченко", birthday=today + timedelta(days=5),
-                    description="Тестовий опис 2",
-                    emails=[Email(id=2, email="user2@example.com")],
-                    phones=[Phone(id=2, phone="3333333333")]
-                    )]
-
-        mocked_execute = MagicMock()
-        mocked_execute.scalars.return_value.all.return_value = contacts
-        self.session.execute.return_value = mocked_execute
-
-        self.session.refresh = AsyncMock()
-
-        result = await self.repo.get_birthdays(limit, offset, owner_id)
-
-        self.assertEqual(result, contacts)
-        self.session.execute.assert_awaited_once()
-        mocked_execute.scalars.return_value.all.assert_called_once()
-
-        for contact in contacts:
-            self.session.refresh.assert_any_await(contact, ['emails', 'phones'])
-
-        logger.info("test_get_birthdays completed successfully.")
-
-    async def test_search_contacts(self):
-        logger.info("Starting test_search_contacts...")
-
-        query = "Іван"
-        contacts = [
-            Contact(id=1, firstname="Іван", lastname="Петренко", birthday="1990-01-01", description="Тестовий опис",
-                    emails=[Email(id=1, email="user1@example.com")],
-                    phones=[Phone(id=1, phone="2222222222")]),
-            Contact(id=2, firstname="Марія", lastname="Шевченко", birthday="1985-02-15", description="Тестовий опис 2",
-                    emails=[Email(id=2, email="user2@example.com")],
-                    phones=[Phone(id=2, phone="3333333333")])
+# The tests share no loop-bound state, so one event loop serves the whole module.
+pytestmark = pytest.mark.asyncio(scope="module")
+
+# Tests only read these, so each model graph and request body is built once for the module.
+IVAN = Contact(id=1, firstname="Іван", lastname="Петренко", birthday="1990-01-01", description="Тестовий опис",
+               emails=[Email(id=1, email="user1@example.com")],
+               phones=[Phone(id=1, phone="2222222222")])
+MARIA = Contact(id=2, firstname="Марія", lastname="Шевченко", birthday="1985-02-15", description="Тестовий опис 2",
+                emails=[Email(id=2, email="user2@example.com")],
+                phones=[Phone(id=2, phone="3333333333")])
+IVAN_UPDATED = Contact(id=1, firstname="Іван", lastname="Петренко", birthday=date(1990, 1, 1),
+                       description="Тестовий опис",
+                       emails=[Email(id=3, email="user2@example.com")],
+                       phones=[Phone(id=3, phone="3333333333")])
+CREATE_BODY = ContactCreate(firstname="Іван", lastname="Петренко", birthday="1990-01-01", description="Тестовий опис",
+                            emails=[EmailSchema(email="user1@example.com")],
+                            phones=[PhoneSchema(phone="2222222222")])
+UPDATE_BODY = ContactUpdateSchema(id=1, firstname="Іван", lastname="Петренко", birthday="1990-01-01",
+                                  description="Тестовий опис",
+                                  emails=[EmailSchema(email="user2@example.com")],
+                                  phones=[PhoneSchema(phone="3333333333")])
+
+
+class FakeAsyncSession:
+    """
+    A stand-in for AsyncSession with only the methods ContactRepository calls.
+    """
+
+    def __init__(self):
+        self.execute = AsyncMock()
+        self.refresh = AsyncMock(return_value=None)
+        self.commit = AsyncMock(return_value=None)
+        self.rollback = AsyncMock(return_value=None)
+        self.add = MagicMock(return_value=None)
+        # Only ``execute`` is configured by the tests; the rest return None and may not grow children.
+        for method in (self.refresh, self.commit, self.rollback, self.add):
+            seal(method)
+
+
+def stub_scalars_all(session: FakeAsyncSession, items: list) -> MagicMock:
+    """
+    Makes the next ``session.execute`` return a result whose ``scalars().all()`` is ``items``.
+    """
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = items
+    seal(result)
+    session.execute.return_value = result
+    return result
+
+
+def stub_unique_scalar_one_or_none(session: FakeAsyncSession, item) -> MagicMock:
+    """
+    Makes the next ``session.execute`` return a result whose ``unique().scalar_one_or_none()`` is ``item``.
+    """
+    result = MagicMock()
+    result.unique.return_value.scalar_one_or_none.return_value = item
+    seal(result)
+    session.execute.return_value = result
+    return result
+
+
+@pytest.fixture(scope="module")
+def user():
+    return User(id=1, username='test_user', hashed_password="qwerty", is_active=True)
+
+
+@pytest.fixture
+def session():
+    return FakeAsyncSession()
+
+
+@pytest.fixture
+def repo(session):
+    return ContactRepository(session)
+
+
+@pytest.mark.parametrize("method, args", [
+    ("get_all_contacts", (10, 0)),
+    ("get_birthdays", (10, 0, 1)),
+    ("search_contacts", ("Іван", 1)),
+])
+async def test_list_queries(repo, session, method, args):
+    logger.info("Starting test_list_queries[%s]...", method)
+
+    contacts = [IVAN, MARIA]
+    mocked_result = stub_scalars_all(session, contacts)
+
+    result = await getattr(repo, method)(*args)
+    logger.debug("Retrieved contacts: %s", result)
+
+    assert result == contacts
+    session.execute.assert_awaited_once()
+    mocked_result.scalars.return_value.all.assert_called_once()
+    session.refresh.assert_not_awaited()
+    logger.info("test_list_queries[%s] completed successfully.", method)
+
+
+async def test_get_contact(repo, session):
+    logger.info("Starting test_get_contact...")
+
+    contact_id = 1
+    owner_id = 1
+    contact = IVAN
+    mocked_contact = stub_unique_scalar_one_or_none(session, contact)
+
+    result = await repo.get_contact(contact_id, owner_id)
+    logger.debug("Retrieved contact: %s", result)
+
+    assert result.firstname == contact.firstname
+    assert result.lastname == contact.lastname
+    assert result.birthday == contact.birthday
+    assert result.description == contact.description
+    assert [e.email for e in result.emails] == [e.email for e in contact.emails]
+    assert [p.phone for p in result.phones] == [p.phone for p in contact.phones]
+
+    session.execute.assert_called_once()
+    mocked_contact.unique.return_value.scalar_one_or_none.assert_called_once()
+    logger.info("test_get_contact completed successfully.")
+
+
+async def test_create_contact(repo, session, user):
+    logger.info("Starting test_create_contact...")
+    body = CREATE_BODY
+
+    result = await repo.create_contact(body, user.id)
+    logger.debug("Contact created: %s", result)
+
+    session.add.assert_called_once_with(result)
+    session.commit.assert_awaited_once()
+    assert isinstance(result, Contact)
+    assert result.owner_id == user.id
+    assert result.firstname == body.firstname
+    assert result.lastname == body.lastname
+    assert result.birthday == body.birthday
+    assert result.description == body.description
+    assert [e.email for e in result.emails] == [e.email for e in body.emails]
+    assert [p.phone for p in result.phones] == [p.phone for p in body.phones]
+    logger.info("test_create_contact completed successfully.")
+
+
+async def test_update_contact(repo, session):
+    logger.info("Starting test_update_contact...")
+
+    contact_id = 1
+    owner_id = 1
+    body = UPDATE_BODY
+    # One result serves the UPDATE ... RETURNING, the child lookups and the reload; nothing asserts on it.
+    session.execute.return_value = SimpleNamespace(
+        scalar_one_or_none=lambda: contact_id,
+        scalars=lambda: SimpleNamespace(all=lambda: []),
+        unique=lambda: SimpleNamespace(scalar_one=lambda: IVAN_UPDATED),
+    )
+
+    result = await repo.update_contact(contact_id, body, owner_id)
+    logger.debug("Contact updated: %s", result)
+
+    assert isinstance(result, Contact)
+    assert result.firstname == body.firstname
+    assert result.lastname == body.lastname
+    assert result.birthday == body.birthday
+
+    assert result.description == body.description
+    assert [e.email for e in result.emails] == [e.email for e in body.emails]
+    assert [p.phone for p in result.phones] == [p.phone for p in body.phones]
+    # The reload must overwrite the collections of a contact already loaded in the session.
+    assert session.execute.await_args.kwargs["execution_options"] == {"populate_existing": True}
+    logger.info("test_update_contact completed successfully.")
+
+
+async def test_delete_contact(repo, session):
+    logger.info("Starting test_delete_contact...")
+
+    contact_id = 1
+    owner_id = 1
+    session.execute.return_value = SimpleNamespace(scalar_one_or_none=lambda: contact_id)
+
+    result = await repo.delete_contact(contact_id, owner_id)
+    logger.debug("Contact deleted: %s", result)
+
+    assert result == contact_id
+    session.execute.assert_awaited_once()
+    session.commit.assert_awaited_once()
+
+    logger.info("test_delete_contact completed successfully.")
+
+
+@pytest.mark.parametrize("column", [Email.email, Phone.phone])
+@pytest.mark.parametrize("current, values, removed, added", [
+    ({"a"}, {"a", "b"}, None, {"b"}),
+    ({"a", "b"}, {"a"}, {"b"}, None),
+    ({"a", "b"}, {"b", "c"}, {"a"}, {"c"}),
+    ({"a"}, {"a"}, None, None),
+])
+async def test_sync_children(repo, session, column, current, values, removed, added):
+    # The first execute reads the current values; any DELETE and INSERT follow, in that order.
+    session.execute.side_effect = [SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: list(current))), None, None]
+
+    await repo.sync_children(column, 1, values)
+
+    writes = session.execute.await_args_list[1:]
+    assert len(writes) == (removed is not None) + (added is not None)
+    if removed is not None:
+        stmt = writes[0].args[0]
+        assert stmt.is_delete and stmt.table.name == column.class_.__tablename__
+        params = stmt.compile().params
+        assert params["contact_id_1"] == 1
+        assert set(params[f"{column.key}_1"]) == removed
+    if added is not None:
+        stmt, rows = writes[-1].args
+        assert stmt.is_insert and stmt.table.name == column.class_.__tablename__
+        assert sorted(rows, key=lambda row: row[column.key]) == [
+            {column.key: value, "contact_id": 1} for value in sorted(added)
         ]
 
-        mocked_result = MagicMock()
-        mocked_result.scalars.return_value.all.return_value = contacts
-        self.session.execute.return_value = mocked_result
 
-        result = await self.repo.search_contacts(query, self.user.id)
-        logger.debug(f"Search result: {result}")
+PROJECTED_COLUMNS = ("contacts.id, contacts.firstname, contacts.lastname, contacts.birthday, "
+                     "contacts.description, (SELECT array_agg(emails.email)")
+BIRTHDAY_WINDOW = "EXTRACT(month FROM contacts.birthday)"
+
+
+def stub_mappings(session: FakeAsyncSession, rows: list[dict]) -> None:
+    """
+    Makes ``session.execute`` return a result whose ``mappings().all()`` is ``rows``.
+    """
+    session.execute.return_value = SimpleNamespace(mappings=lambda: SimpleNamespace(all=lambda: rows))
+
+
+def executed_sql(session: FakeAsyncSession) -> tuple[str, dict]:
+    """
+    Compiles the statement of the last ``session.execute`` call for PostgreSQL.
+
+    :return: The SQL and its bound parameters.
+    """
+    compiled = session.execute.await_args.args[0].compile(dialect=postgresql.dialect())
+    return " ".join(compiled.string.split()), compiled.params
+
+
+async def test_contact_rows_shape_aggregated_children(repo, session):
+    stub_mappings(session, [
+        {"id": 1, "firstname": "Іван", "emails": ["user1@example.com"], "phones": None},
+    ])
+
+    result = await repo.get_contacts_projection(10, 0, 1)
+
+    assert result == [{"id": 1, "firstname": "Іван", "emails": [{"email": "user1@example.com"}], "phones": []}]
+
+
+@pytest.mark.parametrize("owner_id, limit, offset", [(1, 10, 0), (2, 5, 20)])
+async def test_get_contacts_projection_pages_by_offset(repo, session, owner_id, limit, offset):
+    stub_mappings(session, [])
+
+    await repo.get_contacts_projection(limit, offset, owner_id)
+
+    sql, params = executed_sql(session)
+    assert sql.startswith(f"SELECT {PROJECTED_COLUMNS}")
+    assert "WHERE contacts.owner_id = %(owner_id_1)s ORDER BY contacts.id LIMIT" in sql
+    assert params == {"owner_id_1": owner_id, "limit_1": limit, "offset_1": offset}
+
+
+async def test_get_contacts_projection_pages_by_cursor(repo, session):
+    stub_mappings(session, [])
+
+    await repo.get_contacts_projection(10, 20, 1, cursor=5)
+
+    sql, params = executed_sql(session)
+    assert "WHERE contacts.owner_id = %(owner_id_1)s AND contacts.id > %(cursor_1)s ORDER BY contacts.id" in sql
+    assert "OFFSET" not in sql
+    assert params == {"owner_id_1": 1, "cursor_1": 5, "limit_1": 10}
 
-        self.assertEqual(result, contacts)
-        self.session.execute.assert_awaited_once()
-        # for contact in contacts:
-        #     self.session.refresh.assert_awaited_with(contact, ['emails', 'phones'])
 
-        logger.info("test_search_contacts completed successfully.")
+@pytest.mark.parametrize("method, args, owner_id", [
+    ("get_birthdays_projection", (3, 4, 2), 2),
+    ("get_all_birthdays_projection", (3, 4), None),
+])
+async def test_birthdays_projections(repo, session, method, args, owner_id):
+    stub_mappings(session, [])
 
+    await getattr(repo, method)(*args)
 
-if __name__ == "__main__":
-    unittest.main()
+    sql, params = executed_sql(session)
+    assert sql.startswith(f"SELECT {PROJECTED_COLUMNS}")
+    assert BIRTHDAY_WINDOW in sql
+    # The window spans the next seven days from the database's current date.
+    assert params["current_date_1"] == 7
+    assert (params.get("owner_id_1"), params["limit_1"], params["offset_1"]) == (owner_id, 3, 4)
+    assert ("contacts.owner_id" in sql) is (owner_id is not None)
@@ -0,0 +1,21 @@
+from datetime import date
+
+import pytest
+from pydantic import ValidationError
+
+from src.contacts.schema_contacts import ContactCreate
+
+
+def make_contact(birthday) -> ContactCreate:
+    return ContactCreate(firstname="Іван", lastname="Петренко", birthday=birthday)
+
+
+@pytest.mark.parametrize("birthday", ["1990-01-01", date(1990, 1, 1)])
+def test_birthday_accepts_iso_dates(birthday):
+    assert make_contact(birthday).birthday == date(1990, 1, 1)
+
+
+@pytest.mark.parametrize("birthday", ["19900101", "1990-W01-1", "1990-1-1", "01.01.1990", ""])
+def test_birthday_rejects_other_formats(birthday):
+    with pytest.raises(ValidationError):
+        make_contact(birthday)
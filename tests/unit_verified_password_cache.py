@@ -0,0 +1,67 @@
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.auth import auth
+from src.auth.auth import VERIFIED_PASSWORD_KEY_PREFIX, auth_service
+from src.auth.password_utils import get_password_hash
+
+pytestmark = pytest.mark.asyncio(scope="module")
+
+OLD_HASH = get_password_hash("old-password")
+NEW_HASH = get_password_hash("new-password")
+
+
+class FakeRedis:
+    """
+    An in-memory stand-in for the Redis commands verify_password uses, ignoring expiry.
+    """
+
+    def __init__(self):
+        self.store: dict[str, object] = {}
+
+    async def exists(self, key):
+        return int(key in self.store)
+
+    async def set(self, key, value, ex=None):
+        self.store[key] = value
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    fake = FakeRedis()
+    monkeypatch.setattr(auth_service, "cache", fake)
+    return fake
+
+
+@pytest.fixture
+def verifier(monkeypatch):
+    fake = AsyncMock(wraps=auth.verify_password_async)
+    monkeypatch.setattr(auth, "verify_password_async", fake)
+    return fake
+
+
+async def test_repeated_check_is_served_from_cache(cache, verifier):
+    assert await auth_service.verify_password("old-password", OLD_HASH) is True
+    assert await auth_service.verify_password("old-password", OLD_HASH) is True
+
+    assert verifier.await_count == 1
+    [key] = cache.store
+    assert key.startswith(VERIFIED_PASSWORD_KEY_PREFIX)
+    assert "old-password" not in key
+
+
+async def test_wrong_password_is_not_cached(cache, verifier):
+    assert await auth_service.verify_password("wrong-password", OLD_HASH) is False
+
+    assert cache.store == {}
+
+
+async def test_password_change_invalidates_cached_check(cache, verifier):
+    assert await auth_service.verify_password("old-password", OLD_HASH) is True
+
+    # After the change the user row holds NEW_HASH, so the old password must be checked again and fail.
+    assert await auth_service.verify_password("old-password", NEW_HASH) is False
+    assert await auth_service.verify_password("new-password", NEW_HASH) is True
+
+    assert verifier.await_count == 3